@@ -0,0 +1,155 @@
+from player import Player
+from chess_piece import ChessPiece
+from pawn import Pawn
+from knight import Knight
+from bishop import Bishop
+from rook import Rook
+from queen import Queen
+from king import King
+from zobrist import PIECE_KEYS
+
+# Squares are numbered row * 8 + col, so square 0 is the top left corner
+# (black's queen rook) and square 63 is the bottom right corner.
+#
+# Every piece kind gets its own 64-bit integer: kind = color * 6 + piece type,
+# with white first. EMPTY marks a square with nothing on it.
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+WHITE, BLACK = 0, 1
+EMPTY = -1
+
+PIECE_TYPES = (Pawn, Knight, Bishop, Rook, Queen, King)
+PLAYERS = (Player.WHITE, Player.BLACK)
+
+_TYPE_INDEX = {piece_type: index for index, piece_type in enumerate(PIECE_TYPES)}
+_kind_pieces = [None] * 12
+
+
+def color_of(player: Player) -> int:
+    return WHITE if player == Player.WHITE else BLACK
+
+
+def piece_kind(piece: ChessPiece) -> int:
+    index = _TYPE_INDEX.get(type(piece))
+    if index is None:
+        # subclasses of the standard pieces still map onto their base kind
+        for index, piece_type in enumerate(PIECE_TYPES):
+            if isinstance(piece, piece_type):
+                break
+        else:
+            raise TypeError("Piece is not a standard chess piece.")
+    return color_of(piece.player) * 6 + index
+
+
+def piece_for_kind(kind: int) -> ChessPiece:
+    # Pieces carry no state beyond type and owner, so one instance per kind
+    # is shared by every square and every board (a flyweight)
+    piece = _kind_pieces[kind]
+    if piece is None:
+        piece = PIECE_TYPES[kind % 6](PLAYERS[kind // 6])
+        _kind_pieces[kind] = piece
+    return piece
+
+
+def shared_piece(piece_type: type, player: Player) -> ChessPiece:
+    """The shared instance for a piece type and owner, e.g. shared_piece(Pawn, Player.WHITE)."""
+    return piece_for_kind(color_of(player) * 6 + _TYPE_INDEX[piece_type])
+
+
+class BitBoard:
+    """Position stored as one 64-bit integer per piece kind."""
+
+    def __init__(self):
+        self.pieces = [0] * 12
+        self.colors = [0, 0]
+        self.occupied = 0
+        # Zobrist hash of the pieces, kept up to date by put
+        self.key = 0
+        # king square per color, None while that side has no king
+        self.kings = [None, None]
+        # bumped on every change so views and caches know when they are stale
+        self.version = 0
+        self.__view = None
+        self.__view_version = -1
+
+    def kind_at(self, square: int) -> int:
+        bit = 1 << square
+        if not self.occupied & bit:
+            return EMPTY
+        kind = 0 if self.colors[WHITE] & bit else 6
+        pieces = self.pieces
+        while not pieces[kind] & bit:
+            kind += 1
+        return kind
+
+    def piece(self, square: int) -> ChessPiece:
+        kind = self.kind_at(square)
+        if kind == EMPTY:
+            return None
+        return piece_for_kind(kind)
+
+    def put(self, square: int, piece: ChessPiece):
+        bit = 1 << square
+        if self.occupied & bit:
+            old = self.kind_at(square)
+            self.pieces[old] ^= bit
+            self.colors[old // 6] ^= bit
+            self.occupied ^= bit
+            self.key ^= PIECE_KEYS[old][square]
+            if old % 6 == KING:
+                self.__find_king(old)
+        if piece is not None:
+            kind = piece_kind(piece)
+            self.pieces[kind] |= bit
+            self.colors[kind // 6] |= bit
+            self.occupied |= bit
+            self.key ^= PIECE_KEYS[kind][square]
+            if kind % 6 == KING:
+                self.__find_king(kind)
+        self.version += 1
+
+    def __find_king(self, kind: int):
+        kings = self.pieces[kind]
+        self.kings[kind // 6] = (kings & -kings).bit_length() - 1 if kings else None
+
+    def clear(self):
+        for square in range(64):
+            if self.occupied >> square & 1:
+                self.put(square, None)
+
+    def load(self, rows):
+        rows = [list(row) for row in rows]
+        self.clear()
+        for row in range(8):
+            for col in range(8):
+                if rows[row][col] is not None:
+                    self.put(row * 8 + col, rows[row][col])
+
+    @property
+    def rows(self):
+        # Compatibility view for code that still indexes board[row][col].
+        # Built on first use after a change; tuples keep it read-only.
+        if self.__view_version != self.version:
+            self.__view = tuple(
+                tuple(self.piece(row * 8 + col) for col in range(8))
+                for row in range(8)
+            )
+            self.__view_version = self.version
+        return self.__view
+
+
+class ListBoard(BitBoard):
+    """The original list-of-lists board, with bitboards kept alongside it."""
+
+    def __init__(self):
+        super().__init__()
+        self.__grid = [[None] * 8 for _ in range(8)]
+
+    def piece(self, square: int) -> ChessPiece:
+        return self.__grid[square >> 3][square & 7]
+
+    def put(self, square: int, piece: ChessPiece):
+        super().put(square, piece)
+        self.__grid[square >> 3][square & 7] = piece
+
+    # rows is the read-only view from BitBoard: handing out the grid itself
+    # would let writes skip put and leave the bitboards, key and kings stale
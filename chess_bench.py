@@ -0,0 +1,186 @@
+import argparse
+import random
+import time
+import tracemalloc
+from chess_model import ChessModel, BACKENDS, CHECK_MODES
+from move import Move
+from parallel_search import ParallelSearch
+from instrumentation import Instrumentation
+
+
+def sample_positions(count: int, plies: int, seed: int = 0) -> list:
+    # Move lists reached by random play from the start, as Move objects
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        model = ChessModel()
+        history = []
+        for _ in range(plies):
+            moves = list(model.legal_moves())
+            if not moves:
+                break
+            move = rng.choice(moves)
+            model.move(move)
+            history.append(move)
+        positions.append(history)
+    return positions
+
+
+def candidate_moves(model: ChessModel) -> list:
+    # Every move the pieces themselves allow, so each one reaches the check test
+    moves = []
+    board = model.board
+    for row in range(8):
+        for col in range(8):
+            piece = board[row][col]
+            if piece is None or piece.player != model.current_player:
+                continue
+            for to_row in range(8):
+                for to_col in range(8):
+                    move = Move(row, col, to_row, to_col)
+                    if piece.is_valid_move(move, board):
+                        moves.append(move)
+    return moves
+
+
+def bench_is_valid_move(backend: str, check_mode: str, positions: list, repeat: int) -> tuple:
+    """Mean seconds for the first is_valid_move call in a position and for each later one.
+
+    The first call builds the position's validity table, which is where the
+    check modes differ; later calls look the move up in that table. Every
+    repeat puts a piece back on its own square first to force a rebuild.
+    """
+    builds = lookups = 0
+    cold = cached = 0.0
+    for history in positions:
+        model = ChessModel(backend, check_mode)
+        for move in history:
+            model.move(move)
+        moves = candidate_moves(model)
+        if not moves:
+            continue
+        first = moves[0]
+        piece = model.piece_at(first.from_row, first.from_col)
+        for _ in range(repeat):
+            # a no-op put still bumps the board version, so the table is stale
+            model.set_piece(first.from_row, first.from_col, piece)
+            start = time.perf_counter()
+            model.is_valid_move(first)
+            cold += time.perf_counter() - start
+            start = time.perf_counter()
+            for move in moves:
+                model.is_valid_move(move)
+            cached += time.perf_counter() - start
+        builds += repeat
+        lookups += repeat * len(moves)
+    return cold / builds, cached / lookups
+
+
+def bench_parallel_search(workers: int, depth: int, positions: list) -> float:
+    """Mean seconds for a ParallelSearch to reach depth over the positions."""
+    elapsed = 0.0
+    with ParallelSearch(workers=workers, max_depth=depth) as search:
+        for history in positions:
+            model = ChessModel()
+            for move in history:
+                model.move(move)
+            # every position starts from an empty table
+            search.clear_table()
+            start = time.perf_counter()
+            search.search(model)
+            elapsed += time.perf_counter() - start
+    return elapsed / len(positions)
+
+
+def bench_board_memory(boards: int) -> tuple:
+    """Bytes per standard board with shared pieces and with fresh pieces."""
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    shared = [ChessModel() for _ in range(boards)]
+    shared_bytes = tracemalloc.get_traced_memory()[0] - start
+    del shared
+
+    start = tracemalloc.get_traced_memory()[0]
+    fresh = []
+    for _ in range(boards):
+        model = ChessModel()
+        # what setup_standard_board used to do: a new object for every piece
+        for row in range(8):
+            for col in range(8):
+                piece = model.piece_at(row, col)
+                if piece is not None:
+                    model.set_piece(row, col, type(piece)(piece.player))
+        fresh.append(model)
+    fresh_bytes = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return shared_bytes / boards, fresh_bytes / boards
+
+
+def profile_play(check_mode: str, positions: list) -> Instrumentation:
+    """Replay the sampled games move by move, checking every candidate, with counters on."""
+    instrumentation = Instrumentation()
+    for history in positions:
+        model = instrumentation.attach(ChessModel(check_mode=check_mode))
+        for move in history:
+            for candidate in candidate_moves(model):
+                model.is_valid_move(candidate)
+            model.move(move)
+        while model.move_history:
+            model.undo()
+    return instrumentation
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ChessModel micro-benchmarks")
+    parser.add_argument("benchmark", nargs="?", choices=("is_valid_move", "parallel", "memory", "profile"), default="is_valid_move")
+    parser.add_argument("--positions", type=int, default=20)
+    parser.add_argument("--plies", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=4, help="search depth for the parallel benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    if args.benchmark == "memory":
+        shared, fresh = bench_board_memory(1000)
+        print("memory per standard board (bytes)")
+        print(f"  fresh pieces  {fresh:9.0f}")
+        print(f"  shared pieces {shared:9.0f}")
+        print(f"  saved         {fresh - shared:9.0f}")
+        return
+
+    positions = sample_positions(args.positions, args.plies)
+    if args.benchmark == "profile":
+        for check_mode in CHECK_MODES:
+            instrumentation = profile_play(check_mode, positions)
+            print(f"{check_mode}: {instrumentation.board_copies} board copies")
+            for name in instrumentation.methods:
+                calls = instrumentation.calls[name]
+                seconds = instrumentation.seconds[name]
+                mean = seconds / calls * 1e6 if calls else 0.0
+                print(f"  {name:14} {calls:8} calls {seconds:9.4f}s {mean:9.2f} us/call")
+        return
+
+    if args.benchmark == "parallel":
+        print(f"time to depth {args.depth} (s per position)")
+        baseline = None
+        for workers in args.workers:
+            seconds = bench_parallel_search(workers, args.depth, positions)
+            if baseline is None:
+                baseline = seconds
+            print(f"  {workers:2} workers {seconds:8.3f}  x{baseline / seconds:.2f}")
+        return
+
+    print("is_valid_move latency (us per call): the first call in a position builds its table,")
+    print("later calls look the move up in it")
+    print(f"  {'backend':9} {'mode':9} {'first':>9} {'':6} {'later':>9}")
+    for backend in BACKENDS:
+        baseline = None
+        for check_mode in CHECK_MODES:
+            cold, cached = bench_is_valid_move(backend, check_mode, positions, args.repeat)
+            if baseline is None:
+                baseline = cold
+            print(f"  {backend:9} {check_mode:9} {cold * 1e6:9.2f} x{baseline / cold:<5.1f} {cached * 1e6:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
+from contextlib import contextmanager
 from enum import Enum
+from typing import NamedTuple
 from player import Player
 from move import Move
 from chess_piece import ChessPiece
@@ -8,6 +10,9 @@ from knight import Knight
 from bishop import Bishop
 from queen import Queen
 from king import King
+from bitboard import BitBoard, ListBoard, color_of, shared_piece
+from move_gen import generate, new_move_list, square_attacked, attack_map
+from zobrist import BLACK_TO_MOVE
 
 
 
@@ -46,17 +51,90 @@ class MoveValidity(Enum):
 
 
 
+# Ways a game can end; ChessModel.outcome() returns None while it goes on
+class GameOutcome(Enum):
+  Checkmate = 1
+  Stalemate = 2
+  ThreefoldRepetition = 3
+  FiftyMoveRule = 4
+
+  def __str__(self):
+      if self.value == 1:
+          return "checkmate"
+      elif self.value == 2:
+          return "stalemate"
+      elif self.value == 3:
+          return "threefold repetition"
+      else:
+          return "fifty-move rule"
+
+
+
+
+
+
+
+
+# One entry of move_history: just enough to take a move back without keeping
+# a copy of the whole board
+class UndoRecord(NamedTuple):
+  from_square: int
+  to_square: int
+  captured: ChessPiece
+  promoted: bool
+  player: Player
+  # halfmove clock before the move
+  halfmove: int = 0
+
+
+
+
+# Board storage selectable at construction. "list" keeps the original
+# list-of-lists grid, "bitboard" keeps only one 64-bit integer per piece kind.
+BACKENDS = {
+  "list": ListBoard,
+  "bitboard": BitBoard,
+}
+
+
+
+
+# How is_valid_move finds out whether a move leaves the mover in check:
+#   "copy"      simulate the move on a full copy of the board (the original way)
+#   "in_place"  make the move on the real board, test, and take it back
+#   "rays"      look along the king's rays with the move's occupancy applied,
+#               without touching the board at all
+CHECK_MODES = ("copy", "in_place", "rays")
 
 
 
 
 class ChessModel:
-  def __init__(self):
+  def __init__(self, backend: str = "list", check_mode: str = "rays"):
+      if backend not in BACKENDS:
+          raise ValueError(f"Unknown board backend: {backend}")
+      if check_mode not in CHECK_MODES:
+          raise ValueError(f"Unknown check mode: {check_mode}")
+      self.__check_mode = check_mode
       self.__nrows = 8
       self.__ncols = 8
       self.__player = Player.WHITE
       self.__message_code = MoveValidity.Valid
-      self.board = [[None] * self.__ncols for _ in range(self.__nrows)]
+      self.__backend = backend
+      self.__squares = BACKENDS[backend]()
+      self.__move_lists = []
+      self.__attack_maps = [0, 0]
+      self.__attack_versions = [-1, -1]
+      self.__cached_moves = {}
+      self.__move_table_key = None
+      self.__tablebase = None
+      # Plies since the last capture or pawn move, and how many times each
+      # position (by Zobrist hash) stood before a move in move_history
+      self.__halfmove_clock = 0
+      self.__repetitions = {}
+      # Plies played before the first move in move_history, counting from
+      # white's first move of the game; set when a position is loaded
+      self.__start_ply = 0
       self.setup_standard_board()
       self.move_history = []
       self.temp_board = None
@@ -64,37 +142,38 @@ class ChessModel:
 
 
 
+  # Every board shares the same 12 piece instances instead of creating 32
   def setup_standard_board(self):
       # Set up pawns
   #This works. just commented for testing
       for col in range(self.ncols):
-          self.set_piece(1, col, Pawn(Player.BLACK))
-          self.set_piece(self.nrows - 2, col, Pawn(Player.WHITE))
+          self.set_piece(1, col, shared_piece(Pawn, Player.BLACK))
+          self.set_piece(self.nrows - 2, col, shared_piece(Pawn, Player.WHITE))
 
 
 
 
       # Set up other pieces
-      self.set_piece(0, 0, Rook(Player.BLACK))
-      self.set_piece(0, 1, Knight(Player.BLACK))
-      self.set_piece(0, 2, Bishop(Player.BLACK))
-      self.set_piece(0, 3, Queen(Player.BLACK))
-      self.set_piece(0, 4, King(Player.BLACK))
-      self.set_piece(0, 5, Bishop(Player.BLACK))
-      self.set_piece(0, 6, Knight(Player.BLACK))
-      self.set_piece(0, 7, Rook(Player.BLACK))
+      self.set_piece(0, 0, shared_piece(Rook, Player.BLACK))
+      self.set_piece(0, 1, shared_piece(Knight, Player.BLACK))
+      self.set_piece(0, 2, shared_piece(Bishop, Player.BLACK))
+      self.set_piece(0, 3, shared_piece(Queen, Player.BLACK))
+      self.set_piece(0, 4, shared_piece(King, Player.BLACK))
+      self.set_piece(0, 5, shared_piece(Bishop, Player.BLACK))
+      self.set_piece(0, 6, shared_piece(Knight, Player.BLACK))
+      self.set_piece(0, 7, shared_piece(Rook, Player.BLACK))
 
 
 
 
-      self.set_piece(7, 0, Rook(Player.WHITE))
-      self.set_piece(7, 1, Knight(Player.WHITE))
-      self.set_piece(7, 2, Bishop(Player.WHITE))
-      self.set_piece(7, 3, Queen(Player.WHITE))
-      self.set_piece(7, 4, King(Player.WHITE))
-      self.set_piece(7, 5, Bishop(Player.WHITE))
-      self.set_piece(7, 6, Knight(Player.WHITE))
-      self.set_piece(7, 7, Rook(Player.WHITE))
+      self.set_piece(7, 0, shared_piece(Rook, Player.WHITE))
+      self.set_piece(7, 1, shared_piece(Knight, Player.WHITE))
+      self.set_piece(7, 2, shared_piece(Bishop, Player.WHITE))
+      self.set_piece(7, 3, shared_piece(Queen, Player.WHITE))
+      self.set_piece(7, 4, shared_piece(King, Player.WHITE))
+      self.set_piece(7, 5, shared_piece(Bishop, Player.WHITE))
+      self.set_piece(7, 6, shared_piece(Knight, Player.WHITE))
+      self.set_piece(7, 7, shared_piece(Rook, Player.WHITE))
 
   #debug
       # self.set_piece(0, 1, King(Player.BLACK))
@@ -111,6 +190,70 @@ class ChessModel:
   def ncols(self) -> int:
       return self.__ncols
 
+  @property
+  def backend(self) -> str:
+      return self.__backend
+
+  @property
+  def check_mode(self) -> str:
+      return self.__check_mode
+
+  # The backend's bitboards (pieces, colors, occupied, kings, kind_at) for
+  # code that needs to read the position quickly. Change it through set_piece.
+  @property
+  def bitboards(self) -> BitBoard:
+      return self.__squares
+
+  # A read-only tuple view, built on first access after each change, for
+  # either backend. Change squares through set_piece or replace the whole
+  # board through the setter, so the hash and bitboards stay in step.
+  @property
+  def board(self):
+      return self.__squares.rows
+
+  @board.setter
+  def board(self, rows):
+      self.__squares.load(rows)
+
+  # 64-bit Zobrist hash of the position, side to move included. set_piece,
+  # move and undo keep it current, so reading it never rescans the board.
+  @property
+  def zobrist_hash(self) -> int:
+      if self.__player == Player.BLACK:
+          return self.__squares.key ^ BLACK_TO_MOVE
+      return self.__squares.key
+
+  # Optional tablebase.Tablebase; positions it covers are settled by a
+  # lookup in is_complete instead of a move search
+  @property
+  def tablebase(self):
+      return self.__tablebase
+
+  @tablebase.setter
+  def tablebase(self, value):
+      self.__tablebase = value
+
+  @property
+  def halfmove_clock(self) -> int:
+      return self.__halfmove_clock
+
+  @halfmove_clock.setter
+  def halfmove_clock(self, value: int):
+      self.__halfmove_clock = value
+
+  # Numbered like a FEN fullmove field: starts at 1 and goes up after each
+  # black move
+  @property
+  def fullmove_number(self) -> int:
+      return (self.__start_ply + len(self.move_history)) // 2 + 1
+
+  # Sets the number of the current position, with the player to move as it
+  # stands, so set current_player first
+  @fullmove_number.setter
+  def fullmove_number(self, value: int):
+      ply = (value - 1) * 2 + (1 if self.__player == Player.BLACK else 0)
+      self.__start_ply = ply - len(self.move_history)
+
   @property
   def current_player(self) -> Player:
       return self.__player
@@ -137,79 +280,220 @@ class ChessModel:
 
 
   def is_valid_move(self, move: Move) -> bool:
-      piece = self.board[move.from_row][move.from_col]
-      if piece is None or piece.player != self.__player:
+      if not (0 <= move.from_row < 8 and 0 <= move.from_col < 8 and 0 <= move.to_row < 8 and 0 <= move.to_col < 8):
           self.__message_code = MoveValidity.Invalid
           return False
 
 
-      if not piece.is_valid_move(move, self.board):
-          self.__message_code = MoveValidity.Invalid
-          return False
+      # Anything the pieces allow is in the table as Valid or MovingIntoCheck;
+      # everything else is Invalid
+      code = (move.from_row * 8 + move.from_col) << 6 | (move.to_row * 8 + move.to_col)
+      self.__message_code = self.__move_table().get(code, MoveValidity.Invalid)
+      return self.__message_code == MoveValidity.Valid
 
 
-      # Simulate the move to check for moving into check
-      simulated_board = []
-      for row in self.board:
-          simulated_row = []
-          for item in row:
-              simulated_row.append(item)
-          simulated_board.append(simulated_row)
-
-      simulated_board[move.to_row][move.to_col] = piece
-      simulated_board[move.from_row][move.from_col] = None
-      if self.in_check(self.__player, simulated_board):
-          self.__message_code = MoveValidity.MovingIntoCheck
-          return False
+  # Validity of every move the current player's pieces can make, built once
+  # per position. Any set_piece, move or undo changes the board version, which
+  # (together with the player to move) makes the cached table stale.
+  def __move_table(self) -> dict:
+      if self.__move_table_key != (self.__squares.version, self.__player):
+          with self.__move_list() as moves:
+              legal, count = self.__checked_moves(moves, self.__player)
+              table = dict.fromkeys(moves[:legal], MoveValidity.Valid)
+              table.update(dict.fromkeys(moves[legal:count], MoveValidity.MovingIntoCheck))
+          self.__cached_moves = table
+          self.__move_table_key = (self.__squares.version, self.__player)
+      return self.__cached_moves
 
 
-      self.__message_code = MoveValidity.Valid
-      return True
   def is_complete(self) -> bool:
-      for row in range(self.__nrows):
-          for col in range(self.__ncols):
-              piece = self.board[row][col]
-              if piece and piece.player == self.__player:
-                  for to_row in range(self.__nrows):
-                      for to_col in range(self.__ncols):
-                          move = Move(row, col, to_row, to_col)
-                          if self.is_valid_move(move):
-                              return False
+      if self.__tablebase is not None:
+          result = self.__tablebase.probe(self)
+          if result is not None:
+              # checkmated: lost with no plies left to play
+              return result.wdl < 0 and result.dtm == 0
+
+      # Stop at the first legal move instead of trying every from/to pair
+      if self.has_legal_move(self.__player):
+          return False
       return True if self.in_check(self.__player) else False
 
 
+  # Stops at the first legal move, and reads the cached move table when
+  # it is current instead of generating anything
+  def has_legal_move(self, player: Player = None) -> bool:
+      if player is None:
+          player = self.__player
+      if self.__move_table_key == (self.__squares.version, player):
+          return MoveValidity.Valid in self.__cached_moves.values()
+      with self.__move_list() as moves:
+          return self.__checked_moves(moves, player, first=True)[0] > 0
+
+
+  # How many times the current position has stood with the same player to
+  # move, counting now
+  def repetitions(self) -> int:
+      return self.__repetitions.get(self.zobrist_hash, 0) + 1
+
+
+  # None while the game goes on. Checkmate and stalemate come first, so a
+  # mate on the hundredth ply still counts as a mate.
+  def outcome(self) -> GameOutcome:
+      if not self.has_legal_move():
+          return GameOutcome.Checkmate if self.in_check(self.__player) else GameOutcome.Stalemate
+      if self.repetitions() >= 3:
+          return GameOutcome.ThreefoldRepetition
+      if self.__halfmove_clock >= 100:
+          return GameOutcome.FiftyMoveRule
+      return None
+
+
+  def is_game_over(self) -> bool:
+      return self.outcome() is not None
+
+
+  # Forget the moves played so far, e.g. after setting up a new position
+  def clear_history(self):
+      # the position keeps its move number
+      self.__start_ply += len(self.move_history)
+      self.move_history.clear()
+      self.__repetitions.clear()
+
+
+  def legal_moves(self, player: Player = None):
+      if player is None:
+          player = self.__player
+
+      # Candidates go into a reusable array of packed from/to codes; only the
+      # moves that survive the check test become Move objects
+      with self.__move_list() as moves:
+          legal, _ = self.__checked_moves(moves, player)
+          for code in moves[:legal]:
+              yield Move(code >> 9, code >> 6 & 7, code >> 3 & 7, code & 7)
+
+
+  # Legal moves as packed from/to codes, written into a move list from
+  # move_gen.new_move_list(); returns how many were written
+  def generate_moves(self, moves, player: Player = None) -> int:
+      if player is None:
+          player = self.__player
+      return self.__checked_moves(moves, player)[0]
+
+
+  # Writes every move the player's pieces can make into moves, legal ones
+  # first: moves[:legal] leave the king safe and moves[legal:count] do not.
+  # The one place moves are generated and checked. With first, stops at the
+  # first legal move. Returns (legal, count).
+  def __checked_moves(self, moves, player: Player, first: bool = False) -> tuple:
+      count = generate(self.__squares, color_of(player), moves)
+      legal = 0
+      for i in range(count):
+          code = moves[i]
+          if self.__leaves_king_safe(code >> 6, code & 63, player):
+              moves[i] = moves[legal]
+              moves[legal] = code
+              legal += 1
+              if first:
+                  break
+      return legal, count
+
+
+  # A move list from the pool for the length of a with block, so nested
+  # calls (a search under legal_moves, say) each get their own
+  @contextmanager
+  def __move_list(self):
+      moves = self.__move_lists.pop() if self.__move_lists else new_move_list()
+      try:
+          yield moves
+      finally:
+          self.__move_lists.append(moves)
+
+
+  def __leaves_king_safe(self, from_square: int, to_square: int, player: Player) -> bool:
+      squares = self.__squares
+      if self.__check_mode == "rays":
+          color = color_of(player)
+          king_square = squares.kings[color]
+          if king_square is None:
+              return True
+          if king_square == from_square:
+              king_square = to_square
+          # occupancy after the move; a captured piece no longer attacks
+          occupied = squares.occupied & ~(1 << from_square) | 1 << to_square
+          return not square_attacked(squares, king_square, color ^ 1, occupied, 1 << to_square)
+
+      if self.__check_mode == "in_place":
+          moved_piece = squares.piece(from_square)
+          captured = squares.piece(to_square)
+          squares.put(to_square, moved_piece)
+          squares.put(from_square, None)
+          safe = not self.in_check(player)
+          squares.put(from_square, moved_piece)
+          squares.put(to_square, captured)
+          return safe
+
+      simulated_board = self.copy_board()
+      simulated_board[to_square >> 3][to_square & 7] = simulated_board[from_square >> 3][from_square & 7]
+      simulated_board[from_square >> 3][from_square & 7] = None
+      return not self.in_check(player, simulated_board)
+
+
   def move(self, move: Move):
       # Check if the game is already in checkmate
       if self.is_complete():
           return
 
-      # Make a copy of the current board state
-      current_state = [row[:] for row in self.board]
+      self.make_move(move.from_row * 8 + move.from_col, move.to_row * 8 + move.to_col)
+
 
-      # Make the move on the board
-      self.board[move.to_row][move.to_col] = self.board[move.from_row][move.from_col]
-      self.board[move.from_row][move.from_col] = None
+  # Square-level move used by move() and by searches: no game-over check and
+  # no validation, the caller is expected to pass a legal move
+  def make_move(self, from_square: int, to_square: int):
+      # Count the position being left, for repetition
+      key = self.zobrist_hash
+      self.__repetitions[key] = self.__repetitions.get(key, 0) + 1
+
+      # Make the move on the board, remembering what was captured
+      moved_piece = self.__squares.piece(from_square)
+      captured = self.__squares.piece(to_square)
+      self.__squares.put(to_square, moved_piece)
+      self.__squares.put(from_square, None)
 
 
       # Check for pawn promotion to Queen
-      moved_piece = self.piece_at(move.to_row, move.to_col)
-      if isinstance(moved_piece, Pawn) and (
-              (moved_piece.player == Player.WHITE and move.to_row == 0) or
-              (moved_piece.player == Player.BLACK and move.to_row == 7)
-      ):
+      promoted = isinstance(moved_piece, Pawn) and (
+              (moved_piece.player == Player.WHITE and to_square < 8) or
+              (moved_piece.player == Player.BLACK and to_square >= 56)
+      )
+      if promoted:
           # Promote the pawn to a Queen
-          promoted_piece = Queen(moved_piece.player)
-          self.board[move.to_row][move.to_col] = promoted_piece
+          promoted_piece = shared_piece(Queen, moved_piece.player)
+          self.__squares.put(to_square, promoted_piece)
+
+      # Save the undo record to the move history
+      self.move_history.append(UndoRecord(from_square, to_square, captured, promoted, self.__player,
+                                          self.__halfmove_clock))
+
+      # Captures and pawn moves cannot be taken back in a real game
+      if captured is not None or isinstance(moved_piece, Pawn):
+          self.__halfmove_clock = 0
+      else:
+          self.__halfmove_clock += 1
 
       # Set the next player
       self.set_next_player()
 
-      # Save the move and the recorded board state to the move history
-      self.move_history.append((current_state, move))
-
   def in_check(self, player: Player, board=None):
       if board is None:
-          board = self.board
+          # The king square is tracked by the board, so this is a lookup in
+          # the attack map when one is current, or a scan outward from the king
+          color = color_of(player)
+          king_square = self.__squares.kings[color]
+          if king_square is None:
+              return False
+          if self.__attack_versions[color ^ 1] == self.__squares.version:
+              return bool(self.__attack_maps[color ^ 1] >> king_square & 1)
+          return square_attacked(self.__squares, king_square, color ^ 1)
 
 
       king_row, king_col = None, None
@@ -235,13 +519,28 @@ class ChessModel:
       return False
 
 
+  # Bitboard of every square the player attacks, recomputed only after the
+  # position changes
+  def attack_map(self, player: Player) -> int:
+      color = color_of(player)
+      if self.__attack_versions[color] != self.__squares.version:
+          self.__attack_maps[color] = attack_map(self.__squares, color)
+          self.__attack_versions[color] = self.__squares.version
+      return self.__attack_maps[color]
+
+
+  # A list-of-lists copy of the board that the caller may change freely
+  def copy_board(self) -> list:
+      return [list(row) for row in self.board]
+
+
   # ChessPiece method -> returns the piece at the given row and col
   def piece_at(self, row: int, col: int) -> ChessPiece:
       # Return None if coordinates are out of bounds
       if not (0 <= row < self.nrows) or not (0 <= col < self.ncols):
           return None
 
-      piece = self.board[row][col]
+      piece = self.__squares.piece(row * 8 + col)
 
       if piece is None:
           return None
@@ -267,7 +566,7 @@ class ChessModel:
       if not (piece is None or isinstance(piece, ChessPiece)):
           raise TypeError("Piece is not a ChessPiece.")
 
-      self.board[row][col] = piece
+      self.__squares.put(row * 8 + col, piece)
 
 
 
@@ -275,16 +574,26 @@ class ChessModel:
       if not self.move_history:
           raise UndoException("No moves to undo")
 
-      # Retrieve the last move and board state from the history
-      last_state, last_move = self.move_history.pop()
+      # Retrieve the last move from the history
+      record = self.move_history.pop()
 
-      # Restore the previous board state using deep copy
-      self.board = []
-      for row in last_state:
-          self.board.append(row[:])
+      # Put the moved piece back, turning a promoted Queen back into a Pawn,
+      # and restore whatever it captured
+      moved_piece = self.__squares.piece(record.to_square)
+      if record.promoted:
+          moved_piece = shared_piece(Pawn, moved_piece.player)
+      self.__squares.put(record.from_square, moved_piece)
+      self.__squares.put(record.to_square, record.captured)
 
       # Switch back to the player who made the undone move
-      self.set_next_player()
+      self.__player = record.player
+      self.__halfmove_clock = record.halfmove
+
+      key = self.zobrist_hash
+      if self.__repetitions.get(key, 0) > 1:
+          self.__repetitions[key] -= 1
+      else:
+          self.__repetitions.pop(key, None)
 
 
 
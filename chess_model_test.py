@@ -0,0 +1,310 @@
+import random
+import unittest
+from bitboard import piece_kind
+from chess_model import ChessModel, BACKENDS, CHECK_MODES, GameOutcome, UndoException
+from fen import load_fen
+from move import Move
+from pawn import Pawn
+from player import Player
+from queen import Queen
+from zobrist import BLACK_TO_MOVE, PIECE_KEYS
+
+
+def play_random(model: ChessModel, plies: int, seed: int) -> list:
+    """Play up to plies random legal moves; returns (board copy, hash, player) before each."""
+    rng = random.Random(seed)
+    seen = []
+    for _ in range(plies):
+        moves = list(model.legal_moves())
+        if not moves:
+            break
+        seen.append((model.copy_board(), model.zobrist_hash, model.current_player))
+        model.move(rng.choice(moves))
+    return seen
+
+
+def rescan_hash(model: ChessModel) -> int:
+    """The Zobrist hash computed from scratch over every square."""
+    key = BLACK_TO_MOVE if model.current_player == Player.BLACK else 0
+    for row in range(8):
+        for col in range(8):
+            piece = model.piece_at(row, col)
+            if piece is not None:
+                key ^= PIECE_KEYS[piece_kind(piece)][row * 8 + col]
+    return key
+
+
+def validity_table(model: ChessModel) -> list:
+    """is_valid_move and messageCode for every from/to pair."""
+    table = []
+    for start in range(64):
+        for end in range(64):
+            valid = model.is_valid_move(Move(start // 8, start % 8, end // 8, end % 8))
+            table.append((valid, model.messageCode))
+    return table
+
+
+class TestChessModelBoard(unittest.TestCase):
+    def test_board_is_read_only(self):
+        for backend in BACKENDS:
+            model = ChessModel(backend)
+            with self.assertRaises(TypeError):
+                model.board[6][4] = None
+            self.assertIsInstance(model.piece_at(6, 4), Pawn)
+            self.assertTrue(model.is_valid_move(Move(6, 4, 4, 4)))
+
+    def test_board_follows_set_piece(self):
+        for backend in BACKENDS:
+            model = ChessModel(backend)
+            before = model.zobrist_hash
+            model.set_piece(6, 4, None)
+            self.assertIsNone(model.board[6][4])
+            self.assertNotEqual(model.zobrist_hash, before)
+            self.assertFalse(model.is_valid_move(Move(6, 4, 4, 4)))
+
+    def test_copy_board_is_writable(self):
+        model = ChessModel()
+        board = model.copy_board()
+        board[6][4] = None
+        self.assertIsInstance(model.piece_at(6, 4), Pawn)
+
+
+class TestChessModelUndo(unittest.TestCase):
+    def test_undo_restores_every_position(self):
+        for backend in BACKENDS:
+            for seed in range(5):
+                model = ChessModel(backend)
+                seen = play_random(model, 80, seed)
+                self.assertEqual(len(model.move_history), len(seen))
+                while seen:
+                    board, key, player = seen.pop()
+                    model.undo()
+                    self.assertEqual(model.copy_board(), board)
+                    self.assertEqual(model.zobrist_hash, key)
+                    self.assertEqual(model.current_player, player)
+
+    def test_undo_empty(self):
+        model = ChessModel()
+        with self.assertRaises(UndoException):
+            model.undo()
+
+    def test_promotion_round_trip(self):
+        for backend in BACKENDS:
+            model = ChessModel(backend)
+            load_fen(model, "4k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+            key = model.zobrist_hash
+            model.move(Move(1, 1, 0, 1))
+            self.assertIsInstance(model.piece_at(0, 1), Queen)
+            self.assertEqual(model.piece_at(0, 1).player, Player.WHITE)
+            self.assertIsNone(model.piece_at(1, 1))
+            self.assertTrue(model.move_history[-1].promoted)
+            model.undo()
+            self.assertIsInstance(model.piece_at(1, 1), Pawn)
+            self.assertIsNone(model.piece_at(0, 1))
+            self.assertEqual(model.zobrist_hash, key)
+            self.assertEqual(model.current_player, Player.WHITE)
+
+    def test_capture_promotion_round_trip(self):
+        for backend in BACKENDS:
+            model = ChessModel(backend)
+            load_fen(model, "4k3/8/8/8/8/8/6p1/4K2R b - - 0 1")
+            rook = model.piece_at(7, 7)
+            model.move(Move(6, 6, 7, 7))
+            self.assertIsInstance(model.piece_at(7, 7), Queen)
+            self.assertEqual(model.piece_at(7, 7).player, Player.BLACK)
+            self.assertIs(model.move_history[-1].captured, rook)
+            model.undo()
+            self.assertIs(model.piece_at(7, 7), rook)
+            self.assertIsInstance(model.piece_at(6, 6), Pawn)
+            self.assertEqual(model.piece_at(6, 6).player, Player.BLACK)
+
+
+class TestChessModelCheckModes(unittest.TestCase):
+    def assert_tables_agree(self, models: list):
+        # every backend and check mode gives what a model built fresh from
+        # the same position gives, so no stale table survives a change
+        fresh = ChessModel()
+        fresh.board = models[0].copy_board()
+        fresh.current_player = models[0].current_player
+        expected = validity_table(fresh)
+        for model in models:
+            board = model.copy_board()
+            self.assertEqual(validity_table(model), expected, (model.backend, model.check_mode))
+            # in_place makes and takes back moves on the live board
+            self.assertEqual(model.copy_board(), board)
+
+    def test_modes_agree_through_play(self):
+        for seed in range(2):
+            rng = random.Random(seed)
+            models = [ChessModel(backend, mode) for backend in BACKENDS for mode in CHECK_MODES]
+            for ply in range(20):
+                self.assert_tables_agree(models)
+                moves = list(models[0].legal_moves())
+                if not moves:
+                    break
+                move = rng.choice(moves)
+                for model in models:
+                    model.move(move)
+                if ply % 5 == 4:
+                    for model in models:
+                        model.undo()
+                    self.assert_tables_agree(models)
+                    for model in models:
+                        model.move(move)
+
+    def test_modes_agree_after_set_piece(self):
+        models = [ChessModel(backend, mode) for backend in BACKENDS for mode in CHECK_MODES]
+        for model in models:
+            model.move(Move(6, 4, 4, 4))
+        self.assert_tables_agree(models)
+        # a black queen pinning the d2 pawn, then one checking the king up the e file
+        for row, col in ((3, 0), (5, 4)):
+            for model in models:
+                model.set_piece(row, col, Queen(Player.BLACK))
+            self.assert_tables_agree(models)
+        for model in models:
+            model.set_piece(5, 4, None)
+        self.assert_tables_agree(models)
+
+    def test_modes_agree_after_player_change(self):
+        models = [ChessModel(backend, mode) for backend in BACKENDS for mode in CHECK_MODES]
+        self.assert_tables_agree(models)
+        for model in models:
+            model.current_player = Player.BLACK
+        self.assert_tables_agree(models)
+
+
+class TestChessModelHash(unittest.TestCase):
+    def test_hash_matches_rescan_through_moves_and_undo(self):
+        for backend in BACKENDS:
+            for seed in range(5):
+                model = ChessModel(backend)
+                rng = random.Random(seed)
+                self.assertEqual(model.zobrist_hash, rescan_hash(model))
+                for _ in range(60):
+                    moves = list(model.legal_moves())
+                    if not moves:
+                        break
+                    model.move(rng.choice(moves))
+                    self.assertEqual(model.zobrist_hash, rescan_hash(model))
+                    if rng.random() < 0.2:
+                        model.undo()
+                        self.assertEqual(model.zobrist_hash, rescan_hash(model))
+
+    def test_hash_matches_rescan_after_set_piece(self):
+        for backend in BACKENDS:
+            model = ChessModel(backend)
+            model.set_piece(4, 4, Queen(Player.BLACK))
+            model.set_piece(0, 3, None)
+            model.set_piece(6, 0, Queen(Player.WHITE))
+            model.current_player = Player.BLACK
+            self.assertEqual(model.zobrist_hash, rescan_hash(model))
+
+    def test_same_position_same_hash(self):
+        # the same position reached by different move orders
+        first = ChessModel()
+        second = ChessModel()
+        for move in (Move(7, 6, 5, 5), Move(0, 6, 2, 5), Move(7, 1, 5, 2)):
+            first.move(move)
+        for move in (Move(7, 1, 5, 2), Move(0, 6, 2, 5), Move(7, 6, 5, 5)):
+            second.move(move)
+        self.assertEqual(first.zobrist_hash, second.zobrist_hash)
+        self.assertNotEqual(first.zobrist_hash, ChessModel().zobrist_hash)
+
+
+class TestChessModelOutcome(unittest.TestCase):
+    KNIGHT_SHUFFLE = (Move(7, 6, 5, 5), Move(0, 6, 2, 5), Move(5, 5, 7, 6), Move(2, 5, 0, 6))
+
+    def test_game_goes_on(self):
+        model = ChessModel()
+        self.assertIsNone(model.outcome())
+        self.assertFalse(model.is_game_over())
+        self.assertEqual(model.repetitions(), 1)
+
+    def test_checkmate(self):
+        for backend in BACKENDS:
+            model = ChessModel(backend)
+            for move in (Move(6, 5, 5, 5), Move(1, 4, 3, 4), Move(6, 6, 4, 6), Move(0, 3, 4, 7)):
+                model.move(move)
+            self.assertEqual(model.outcome(), GameOutcome.Checkmate)
+            self.assertTrue(model.is_game_over())
+            self.assertTrue(model.is_complete())
+            self.assertEqual(str(model.outcome()), "checkmate")
+            model.undo()
+            self.assertIsNone(model.outcome())
+
+    def test_stalemate(self):
+        model = ChessModel()
+        load_fen(model, "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+        self.assertEqual(model.outcome(), GameOutcome.Stalemate)
+        self.assertFalse(model.is_complete())
+        self.assertFalse(model.has_legal_move())
+
+    def test_threefold_repetition(self):
+        model = ChessModel()
+        for move in self.KNIGHT_SHUFFLE:
+            model.move(move)
+        self.assertEqual(model.repetitions(), 2)
+        self.assertIsNone(model.outcome())
+        for move in self.KNIGHT_SHUFFLE:
+            model.move(move)
+        self.assertEqual(model.repetitions(), 3)
+        self.assertEqual(model.outcome(), GameOutcome.ThreefoldRepetition)
+        model.undo()
+        self.assertEqual(model.repetitions(), 2)
+        self.assertIsNone(model.outcome())
+
+    def test_repetition_needs_same_player(self):
+        # the same squares with the other side to move is another position
+        model = ChessModel()
+        model.move(Move(7, 6, 5, 5))
+        model.move(Move(0, 6, 2, 5))
+        model.move(Move(5, 5, 7, 6))
+        self.assertEqual(model.repetitions(), 1)
+
+    def test_clear_history_forgets_repetitions(self):
+        model = ChessModel()
+        for move in self.KNIGHT_SHUFFLE * 2:
+            model.move(move)
+        model.clear_history()
+        self.assertEqual(model.repetitions(), 1)
+        self.assertIsNone(model.outcome())
+
+    def test_fifty_move_rule(self):
+        model = ChessModel()
+        load_fen(model, "4k3/8/8/8/8/8/4P3/4K3 w - - 99 80")
+        model.move(Move(7, 4, 7, 3))
+        self.assertEqual(model.halfmove_clock, 100)
+        self.assertEqual(model.outcome(), GameOutcome.FiftyMoveRule)
+        model.undo()
+        self.assertEqual(model.halfmove_clock, 99)
+        self.assertIsNone(model.outcome())
+
+    def test_pawn_move_resets_halfmove_clock(self):
+        model = ChessModel()
+        load_fen(model, "4k3/8/8/8/8/8/4P3/4K3 w - - 99 80")
+        model.move(Move(6, 4, 4, 4))
+        self.assertEqual(model.halfmove_clock, 0)
+        self.assertIsNone(model.outcome())
+        self.assertEqual(model.move_history[-1].halfmove, 99)
+        model.undo()
+        self.assertEqual(model.halfmove_clock, 99)
+
+    def test_capture_resets_halfmove_clock(self):
+        model = ChessModel()
+        load_fen(model, "4k3/8/8/8/8/8/3p4/4K3 w - - 40 80")
+        model.move(Move(7, 4, 6, 3))
+        self.assertEqual(model.halfmove_clock, 0)
+        model.undo()
+        self.assertEqual(model.halfmove_clock, 40)
+
+    def test_checkmate_beats_fifty_move_rule(self):
+        model = ChessModel()
+        load_fen(model, "7k/8/6K1/8/8/8/8/R7 w - - 99 80")
+        model.move(Move(7, 0, 0, 0))
+        self.assertEqual(model.halfmove_clock, 100)
+        self.assertEqual(model.outcome(), GameOutcome.Checkmate)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,335 @@
+import random
+import time
+from typing import NamedTuple
+from chess_model import ChessModel
+from move import Move
+from player import Player
+from bitboard import KING
+from move_gen import new_move_list
+from transposition_table import TranspositionTable, EXACT, LOWER, UPPER
+
+MATE = 100000
+INFINITY = MATE + 1
+MAX_PLY = 64
+
+# Ordering buckets: captures (most valuable victim, least valuable attacker)
+# ahead of killer moves, which go ahead of quiet moves ranked by history
+CAPTURE_ORDER = 1 << 30
+KILLER_ORDER = 1 << 29
+
+# Pawn, knight, bishop, rook, queen, king
+PIECE_VALUES = (100, 320, 330, 500, 900, 0)
+
+# Piece-square tables from white's side, row 0 (black's back rank) first.
+# Black pieces read them with the rows mirrored.
+PAWN_TABLE = (
+      0,   0,   0,   0,   0,   0,   0,   0,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     10,  10,  20,  30,  30,  20,  10,  10,
+      5,   5,  10,  25,  25,  10,   5,   5,
+      0,   0,   0,  20,  20,   0,   0,   0,
+      5,  -5, -10,   0,   0, -10,  -5,   5,
+      5,  10,  10, -20, -20,  10,  10,   5,
+      0,   0,   0,   0,   0,   0,   0,   0,
+)
+KNIGHT_TABLE = (
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50,
+)
+BISHOP_TABLE = (
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20,
+)
+ROOK_TABLE = (
+      0,   0,   0,   0,   0,   0,   0,   0,
+      5,  10,  10,  10,  10,  10,  10,   5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+      0,   0,   0,   5,   5,   0,   0,   0,
+)
+QUEEN_TABLE = (
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+)
+KING_TABLE = (
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20,
+)
+PIECE_TABLES = (PAWN_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_TABLE)
+
+# Material plus placement for every (kind, square), positive for white
+SQUARE_SCORES = tuple(
+    tuple(PIECE_VALUES[kind] + PIECE_TABLES[kind][square] for square in range(64))
+    for kind in range(6)
+) + tuple(
+    tuple(-PIECE_VALUES[kind] - PIECE_TABLES[kind][square ^ 56] for square in range(64))
+    for kind in range(6)
+)
+
+
+def evaluate(model: ChessModel) -> int:
+    """Material and piece-square score from the side to move's point of view."""
+    pieces = model.bitboards.pieces
+    score = 0
+    for kind in range(12):
+        scores = SQUARE_SCORES[kind]
+        bb = pieces[kind]
+        while bb:
+            low = bb & -bb
+            bb ^= low
+            score += scores[low.bit_length() - 1]
+    return score if model.current_player == Player.WHITE else -score
+
+
+def code_to_move(code: int) -> Move:
+    return Move(code >> 9, code >> 6 & 7, code >> 3 & 7, code & 7)
+
+
+# Mate scores count plies from the root; the table stores them relative to the
+# position instead so an entry is correct wherever the position turns up
+def _score_to_table(score: int, ply: int) -> int:
+    if score >= MATE - MAX_PLY:
+        return score + ply
+    if score <= -MATE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def _score_from_table(score: int, ply: int) -> int:
+    if score >= MATE - MAX_PLY:
+        return score - ply
+    if score <= -MATE + MAX_PLY:
+        return score + ply
+    return score
+
+
+def _tablebase_score(result, ply: int) -> int:
+    # a tablebase mate counts like a searched one, dtm plies further on
+    if result.wdl > 0:
+        return MATE - ply - result.dtm
+    if result.wdl < 0:
+        return -MATE + ply + result.dtm
+    return 0
+
+
+class SearchResult(NamedTuple):
+    move: Move
+    score: int
+    depth: int
+    nodes: int
+    seconds: float
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class SearchEngine:
+    """Iterative-deepening alpha-beta search over a ChessModel.
+
+    The model is searched in place with make_move/undo and is left exactly as
+    it was found.
+    """
+
+    def __init__(self, max_depth: int = 4, time_limit: float = None, table: TranspositionTable = None, book=None,
+                 tablebase=None, rng: random.Random = None):
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        # optional; kept between searches so later moves reuse earlier work
+        self.table = table
+        # optional OpeningBook; a book move is played without searching
+        self.book = book
+        # picks among the book's moves; None uses the random module
+        self.rng = rng
+        # optional Tablebase; covered endings are looked up, not searched
+        self.tablebase = tablebase
+        self.nodes = 0
+        self.__deadline = None
+        self.__killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.__history = [0] * 4096
+        self.__move_lists = [new_move_list() for _ in range(MAX_PLY)]
+
+    def best_move(self, model: ChessModel) -> Move:
+        return self.search(model).move
+
+    def search(self, model: ChessModel, root_moves=None) -> SearchResult:
+        """Search the position; root_moves (packed codes) limits the moves tried first."""
+        self.nodes = 0
+        self.__killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.__history = [0] * 4096
+        start = time.perf_counter()
+        self.__deadline = None if self.time_limit is None else start + self.time_limit
+        plies_before = len(model.move_history)
+        if self.book is not None and root_moves is None:
+            move = self.book.choose(model, self.rng)
+            if move is not None:
+                return SearchResult(move, 0, 0, 0, time.perf_counter() - start)
+        if self.tablebase is not None and root_moves is None:
+            result = self.tablebase.probe(model)
+            move = self.tablebase.best_move(model) if result is not None else None
+            if move is not None:
+                return SearchResult(move, _tablebase_score(result, 0), 0, 0, time.perf_counter() - start)
+
+        best_code, best_score, best_depth = 0, 0, 0
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, code = self.__search_root(model, depth, best_code, root_moves)
+            except SearchTimeout:
+                # unwind whatever the interrupted iteration left on the board
+                while len(model.move_history) > plies_before:
+                    model.undo()
+                break
+            best_code, best_score, best_depth = code, score, depth
+            if code == 0 or abs(score) >= MATE - MAX_PLY:
+                break
+
+        move = code_to_move(best_code) if best_code else None
+        return SearchResult(move, best_score, best_depth, self.nodes, time.perf_counter() - start)
+
+    def __search_root(self, model: ChessModel, depth: int, previous_best: int, root_moves):
+        moves = self.__move_lists[0]
+        count = model.generate_moves(moves)
+        if count == 0:
+            return (-MATE if model.in_check(model.current_player) else 0), 0
+        if root_moves is not None:
+            allowed = set(root_moves)
+            kept = 0
+            for i in range(count):
+                if moves[i] in allowed:
+                    moves[kept] = moves[i]
+                    kept += 1
+            count = kept
+            if count == 0:
+                return -INFINITY, 0
+        if not previous_best and self.table is not None:
+            entry = self.table.probe(model.zobrist_hash)
+            if entry is not None:
+                previous_best = entry[3]
+
+        alpha, best_code = -INFINITY, 0
+        for code in self.__order(model, moves, count, 0, previous_best):
+            model.make_move(code >> 6, code & 63)
+            score = -self.__negamax(model, depth - 1, -INFINITY, -alpha, 1)
+            model.undo()
+            if score > alpha:
+                alpha, best_code = score, code
+        # a restricted root only knows the best of its own moves
+        if self.table is not None and root_moves is None:
+            self.table.store(model.zobrist_hash, depth, alpha, EXACT, best_code)
+        return alpha, best_code
+
+    def __negamax(self, model: ChessModel, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if self.__deadline is not None and not self.nodes & 1023 and time.perf_counter() > self.__deadline:
+            raise SearchTimeout()
+        if self.tablebase is not None:
+            result = self.tablebase.probe(model)
+            if result is not None:
+                return _tablebase_score(result, ply)
+        if depth == 0 or ply >= MAX_PLY - 1:
+            return evaluate(model)
+
+        table = self.table
+        table_move = 0
+        if table is not None:
+            key = model.zobrist_hash
+            entry = table.probe(key)
+            if entry is not None:
+                entry_depth, score, bound, table_move = entry
+                if entry_depth >= depth:
+                    score = _score_from_table(score, ply)
+                    if bound == EXACT:
+                        return score
+                    if bound == LOWER and score >= beta:
+                        return score
+                    if bound == UPPER and score <= alpha:
+                        return score
+
+        moves = self.__move_lists[ply]
+        count = model.generate_moves(moves)
+        if count == 0:
+            # checkmate (sooner is worse) or stalemate
+            return -MATE + ply if model.in_check(model.current_player) else 0
+
+        occupied = model.bitboards.occupied
+        original_alpha = alpha
+        best, best_code = -INFINITY, 0
+        for code in self.__order(model, moves, count, ply, table_move):
+            model.make_move(code >> 6, code & 63)
+            score = -self.__negamax(model, depth - 1, -beta, -alpha, ply + 1)
+            model.undo()
+            if score > best:
+                best, best_code = score, code
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not occupied >> (code & 63) & 1:
+                    killers = self.__killers[ply]
+                    if killers[0] != code:
+                        killers[1] = killers[0]
+                        killers[0] = code
+                    self.__history[code] += depth * depth
+                break
+
+        if table is not None:
+            if best <= original_alpha:
+                bound = UPPER
+            elif best >= beta:
+                bound = LOWER
+            else:
+                bound = EXACT
+            table.store(key, depth, _score_to_table(best, ply), bound, best_code)
+        return best
+
+    def __order(self, model: ChessModel, moves, count: int, ply: int, first: int) -> list:
+        board = model.bitboards
+        occupied = board.occupied
+        killers = self.__killers[ply]
+        history = self.__history
+        keyed = []
+        for i in range(count):
+            code = moves[i]
+            if code == first:
+                key = CAPTURE_ORDER << 1
+            elif occupied >> (code & 63) & 1:
+                victim = board.kind_at(code & 63) % 6
+                attacker = board.kind_at(code >> 6) % 6
+                key = CAPTURE_ORDER + victim * 8 + (KING - attacker)
+            elif code == killers[0] or code == killers[1]:
+                key = KILLER_ORDER
+            else:
+                key = history[code]
+            keyed.append((key, code))
+        keyed.sort(reverse=True)
+        return [code for _, code in keyed]
@@ -0,0 +1,139 @@
+from typing import NamedTuple
+from player import Player
+from chess_model import ChessModel
+from bitboard import piece_for_kind, piece_kind
+
+# FEN letters in piece type order: pawn, knight, bishop, rook, queen, king.
+# Upper case is white.
+PIECE_LETTERS = "pnbrqk"
+
+STANDARD_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1"
+
+
+class FenError(ValueError):
+    pass
+
+
+class FenPosition(NamedTuple):
+    """A FEN record split into fields but not yet placed on a board.
+
+    Castling and en passant fields are dropped since ChessModel has neither.
+    """
+    placement: str
+    player: Player
+    halfmove: int = 0
+    fullmove: int = 1
+
+    @classmethod
+    def parse(cls, fen: str) -> "FenPosition":
+        return cls.from_fields(fen.split())
+
+    @classmethod
+    def from_fields(cls, fields: list) -> "FenPosition":
+        if len(fields) < 2:
+            raise FenError(f"Expected placement and side to move: {' '.join(fields)!r}")
+        if fields[1] == "w":
+            player = Player.WHITE
+        elif fields[1] == "b":
+            player = Player.BLACK
+        else:
+            raise FenError(f"Side to move must be 'w' or 'b': {fields[1]!r}")
+        try:
+            halfmove = int(fields[4]) if len(fields) > 4 else 0
+            fullmove = int(fields[5]) if len(fields) > 5 else 1
+        except ValueError:
+            # EPD records put operations where the move counters would be
+            halfmove, fullmove = 0, 1
+        return cls(fields[0], player, halfmove, fullmove)
+
+    def squares(self) -> list:
+        """The 64 squares, row 0 first, as pieces or None."""
+        ranks = self.placement.split("/")
+        if len(ranks) != 8:
+            raise FenError(f"Expected 8 ranks: {self.placement!r}")
+        squares = [None] * 64
+        for row, rank in enumerate(ranks):
+            col = 0
+            for letter in rank:
+                if letter.isdigit():
+                    col += int(letter)
+                    continue
+                piece_type = PIECE_LETTERS.find(letter.lower())
+                if piece_type < 0 or col > 7:
+                    raise FenError(f"Bad rank {rank!r}")
+                color = 0 if letter.isupper() else 1
+                squares[row * 8 + col] = piece_for_kind(color * 6 + piece_type)
+                col += 1
+            if col != 8:
+                raise FenError(f"Rank {rank!r} does not cover 8 squares")
+        return squares
+
+    def apply(self, model: ChessModel):
+        """Replace the model's position with this one and clear its history."""
+        for square, piece in enumerate(self.squares()):
+            model.set_piece(square >> 3, square & 7, piece)
+        model.current_player = self.player
+        model.halfmove_clock = self.halfmove
+        model.clear_history()
+        model.fullmove_number = self.fullmove
+
+    def to_model(self, backend: str = "list") -> ChessModel:
+        model = ChessModel(backend)
+        self.apply(model)
+        return model
+
+    def __str__(self) -> str:
+        side = "w" if self.player == Player.WHITE else "b"
+        return f"{self.placement} {side} - - {self.halfmove} {self.fullmove}"
+
+
+def load_fen(model: ChessModel, fen: str):
+    FenPosition.parse(fen).apply(model)
+
+
+def to_fen(model: ChessModel) -> str:
+    ranks = []
+    for row in range(8):
+        rank = ""
+        empty = 0
+        for col in range(8):
+            piece = model.piece_at(row, col)
+            if piece is None:
+                empty += 1
+                continue
+            if empty:
+                rank += str(empty)
+                empty = 0
+            kind = piece_kind(piece)
+            letter = PIECE_LETTERS[kind % 6]
+            rank += letter.upper() if kind < 6 else letter
+        if empty:
+            rank += str(empty)
+        ranks.append(rank)
+    return str(FenPosition("/".join(ranks), model.current_player, model.halfmove_clock, model.fullmove_number))
+
+
+def read_fens(path: str, models: bool = False, backend: str = "list", reuse_model: bool = False):
+    """Yield the positions in a file of FEN (or EPD) lines, one at a time.
+
+    The file is read lazily line by line and each line is split once. By
+    default the positions come back as FenPosition records; with models=True
+    they come back as ChessModel instances. reuse_model=True loads every
+    position into the same model, which suits callers that finish with one
+    position before asking for the next. Blank lines and lines starting with
+    '#' are skipped.
+    """
+    model = None
+    with open(path) as file:
+        for line in file:
+            fields = line.split()
+            if not fields or fields[0][0] == "#":
+                continue
+            position = FenPosition.from_fields(fields)
+            if not models:
+                yield position
+                continue
+            if model is None or not reuse_model:
+                model = ChessModel(backend)
+            position.apply(model)
+            yield model
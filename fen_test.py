@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from chess_model import ChessModel
+from fen import STANDARD_FEN, FenError, FenPosition, load_fen, read_fens, to_fen
+from move import Move
+from player import Player
+
+POSITIONS = [
+    STANDARD_FEN,
+    "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b - - 0 1",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w - - 0 10",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 b - - 7 43",
+    "4k3/8/8/8/8/8/8/4K2R w - - 99 120",
+]
+
+
+class TestFen(unittest.TestCase):
+    def test_round_trip(self):
+        for fen in POSITIONS:
+            model = ChessModel()
+            load_fen(model, fen)
+            self.assertEqual(to_fen(model), fen)
+
+    def test_fullmove_counts_on_from_loaded_position(self):
+        model = ChessModel()
+        load_fen(model, "4k3/8/8/8/8/8/8/4K2R w - - 0 10")
+        model.move(Move(7, 7, 5, 7))
+        self.assertTrue(to_fen(model).endswith(" b - - 1 10"))
+        model.move(Move(0, 4, 0, 3))
+        self.assertTrue(to_fen(model).endswith(" w - - 2 11"))
+        model.undo()
+        model.undo()
+        self.assertTrue(to_fen(model).endswith(" w - - 0 10"))
+
+    def test_fullmove_black_to_move(self):
+        model = ChessModel()
+        load_fen(model, "4k3/8/8/8/8/8/8/4K2R b - - 0 10")
+        model.move(Move(0, 4, 0, 3))
+        self.assertTrue(to_fen(model).endswith(" w - - 1 11"))
+
+    def test_standard_fen_matches_new_model(self):
+        model = ChessModel()
+        self.assertEqual(to_fen(model), STANDARD_FEN)
+        loaded = FenPosition.parse(STANDARD_FEN).to_model()
+        self.assertEqual(loaded.zobrist_hash, model.zobrist_hash)
+
+    def test_parse(self):
+        position = FenPosition.parse("8/8/8/8/8/8/8/K6k b - - 3 7")
+        self.assertEqual(position.player, Player.BLACK)
+        self.assertEqual(position.halfmove, 3)
+        self.assertEqual(position.fullmove, 7)
+
+    def test_parse_invalid(self):
+        for fen in ("8/8/8 w - - 0 1", "8/8/8/8/8/8/8/9 w - - 0 1", "8/8/8/8/8/8/8/8 x - - 0 1", "8/8/8/8/8/8/8/8"):
+            with self.assertRaises(FenError):
+                FenPosition.parse(fen).squares()
+
+    def test_read_fens(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "positions.fen")
+            with open(path, "w") as file:
+                file.write("# test positions\n\n" + "\n".join(POSITIONS) + "\n")
+            self.assertEqual([str(position) for position in read_fens(path)], POSITIONS)
+            fens = [to_fen(model) for model in read_fens(path, models=True, reuse_model=True)]
+            self.assertEqual(fens, POSITIONS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,259 @@
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from chess_model import ChessModel, UndoException
+from move import Move
+from fen import FenError, load_fen, to_fen
+from instrumentation import Instrumentation
+
+# Line-delimited JSON: every request is one object on one line and gets one
+# response line, in order. A request names an "op" and, for everything but
+# "new", the "game" it is for. An "id" field is echoed back unchanged.
+#
+#   {"op": "new"}                          -> {"ok": true, "game": 1, "fen": ...}
+#   {"op": "new", "fen": "..."}            start from a position
+#   {"op": "move", "game": 1, "move": [6, 4, 4, 4]}
+#                                          -> {"ok": true, "valid": true, "validity": "Valid", ...}
+#   {"op": "validity", "game": 1, "move": [...]}   same check, nothing played
+#   {"op": "undo", "game": 1}
+#   {"op": "moves", "game": 1}             -> {"ok": true, "moves": [[6, 4, 4, 4], ...]}
+#   {"op": "state", "game": 1}
+#   {"op": "close", "game": 1}
+#   {"op": "metrics"}                      -> {"ok": true, "metrics": {...}}; with
+#                                             "format": "prometheus" the text format
+#
+# Failures come back as {"ok": false, "error": "..."}.
+MAX_LINE = 1 << 16
+# pending connections the listener queues; load tests open thousands at once
+BACKLOG = 1024
+
+
+class RequestError(Exception):
+    pass
+
+
+class Session:
+    """One game: its model, a lock serializing requests for it, and when it was last used."""
+
+    def __init__(self, model: ChessModel):
+        self.model = model
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+def _state(model: ChessModel) -> dict:
+    outcome = model.outcome()
+    return {
+        "fen": to_fen(model),
+        "player": model.current_player.name,
+        "outcome": None if outcome is None else str(outcome),
+    }
+
+
+def _parse_move(request: dict) -> Move:
+    coords = request.get("move")
+    if not isinstance(coords, list) or len(coords) != 4 or not all(isinstance(c, int) for c in coords):
+        raise RequestError("move must be [from_row, from_col, to_row, to_col]")
+    return Move(*coords)
+
+
+class GameServer:
+    """Hosts ChessModel games for many clients on one event loop.
+
+    Requests for one game are handled one at a time under its session lock.
+    Games nobody has touched for idle_timeout seconds are evicted.
+    """
+
+    def __init__(self, idle_timeout: float = 600, backend: str = "list", instrumentation: Instrumentation = None):
+        self.idle_timeout = idle_timeout
+        self.backend = backend
+        # when given, every game's model reports into it
+        self.instrumentation = instrumentation
+        self.sessions = {}
+        self.__ids = itertools.count(1)
+        self.__server = None
+        self.__evictor = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765, path: str = None):
+        """Listen on a Unix socket when path is given, otherwise on TCP."""
+        if path is not None:
+            self.__server = await asyncio.start_unix_server(self.__serve_client, path, limit=MAX_LINE,
+                                                            backlog=BACKLOG)
+        else:
+            self.__server = await asyncio.start_server(self.__serve_client, host, port, limit=MAX_LINE,
+                                                       backlog=BACKLOG)
+        self.__evictor = asyncio.create_task(self.__evict_idle())
+        return self.__server
+
+    async def close(self):
+        if self.__evictor is not None:
+            self.__evictor.cancel()
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+
+    async def __evict_idle(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_timeout / 4))
+            self.evict_idle()
+
+    def evict_idle(self) -> int:
+        """Drop idle sessions that no request is using; returns how many went."""
+        cutoff = time.monotonic() - self.idle_timeout
+        idle = [game for game, session in self.sessions.items()
+                if session.last_used < cutoff and not session.lock.locked()]
+        for game in idle:
+            del self.sessions[game]
+        return len(idle)
+
+    async def __serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # longer than MAX_LINE; the stream cannot be resynchronized
+                    writer.write(b'{"ok": false, "error": "request line too long"}\n')
+                    break
+                if not line:
+                    break
+                response = await self.handle_line(line)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_line(self, line: bytes) -> dict:
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {"ok": False, "error": "request is not valid JSON"}
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "request must be a JSON object"}
+        try:
+            response = await self.handle(request)
+        except RequestError as error:
+            response = {"ok": False, "error": str(error)}
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    async def handle(self, request: dict) -> dict:
+        op = request.get("op")
+        if op == "new":
+            model = ChessModel(self.backend)
+            if self.instrumentation is not None:
+                self.instrumentation.attach(model)
+            if "fen" in request:
+                if not isinstance(request["fen"], str):
+                    raise RequestError("fen must be a string")
+                try:
+                    load_fen(model, request["fen"])
+                except FenError as error:
+                    raise RequestError(f"bad fen: {error}")
+            game = next(self.__ids)
+            self.sessions[game] = Session(model)
+            return {"ok": True, "game": game, **_state(model)}
+        if op == "metrics":
+            if self.instrumentation is None:
+                raise RequestError("server was started without instrumentation")
+            if request.get("format") == "prometheus":
+                return {"ok": True, "metrics": self.instrumentation.prometheus()}
+            return {"ok": True, "metrics": self.instrumentation.snapshot()}
+
+        game = request.get("game")
+        session = self.sessions.get(game) if isinstance(game, int) else None
+        if session is None:
+            raise RequestError("no such game")
+        async with session.lock:
+            session.last_used = time.monotonic()
+            model = session.model
+            if op == "move" or op == "validity":
+                move = _parse_move(request)
+                valid = model.is_valid_move(move)
+                validity = model.messageCode
+                response = {"ok": True, "valid": valid, "validity": validity.name, "message": str(validity)}
+                if op == "move" and valid:
+                    if model.is_game_over():
+                        raise RequestError("game is over")
+                    model.move(move)
+                    response.update(_state(model))
+                return response
+            if op == "undo":
+                try:
+                    model.undo()
+                except UndoException as error:
+                    raise RequestError(error.message)
+                return {"ok": True, **_state(model)}
+            if op == "moves":
+                moves = [[m.from_row, m.from_col, m.to_row, m.to_col] for m in model.legal_moves()]
+                return {"ok": True, "moves": moves}
+            if op == "state":
+                return {"ok": True, **_state(model)}
+            if op == "close":
+                del self.sessions[game]
+                return {"ok": True}
+        raise RequestError(f"unknown op: {op!r}")
+
+
+class GameClient:
+    """Minimal client: one connection, one request in flight at a time."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = 8765, path: str = None) -> "GameClient":
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path, limit=MAX_LINE)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+        return cls(reader, writer)
+
+    async def request(self, op: str, **fields) -> dict:
+        self.writer.write(json.dumps({"op": op, **fields}).encode() + b"\n")
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        return json.loads(line)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def serve(host: str, port: int, path: str, idle_timeout: float, backend: str, instrument: bool):
+    server = GameServer(idle_timeout, backend, Instrumentation() if instrument else None)
+    listener = await server.start(host, port, path)
+    print(f"serving on {path or f'{host}:{port}'}", flush=True)
+    try:
+        await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Line-delimited JSON game server for ChessModel")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--idle-timeout", type=float, default=600, help="seconds before an unused game is dropped")
+    parser.add_argument("--backend", choices=("list", "bitboard"), default="list")
+    parser.add_argument("--instrument", action="store_true", help="count and time ChessModel calls for the metrics op")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.idle_timeout, args.backend, args.instrument))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
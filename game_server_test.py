@@ -0,0 +1,127 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from game_server import GameClient, GameServer
+from instrumentation import Instrumentation
+
+
+class TestGameServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = GameServer(idle_timeout=60)
+
+    async def request(self, **fields) -> dict:
+        return await self.server.handle_line(json.dumps(fields).encode())
+
+    async def new_game(self, **fields) -> int:
+        response = await self.request(op="new", **fields)
+        self.assertTrue(response["ok"])
+        return response["game"]
+
+    async def test_new(self):
+        response = await self.request(op="new", id="a")
+        self.assertEqual(response["id"], "a")
+        self.assertEqual(response["player"], "WHITE")
+        self.assertIsNone(response["outcome"])
+        fen = "4k3/8/8/8/8/8/8/4K2R b - - 3 20"
+        response = await self.request(op="new", fen=fen)
+        self.assertEqual(response["fen"], fen)
+        self.assertNotEqual(response["game"], 1)
+        self.assertEqual(len(self.server.sessions), 2)
+
+    async def test_move_and_validity(self):
+        game = await self.new_game()
+        response = await self.request(op="validity", game=game, move=[6, 4, 4, 4])
+        self.assertEqual((response["valid"], response["validity"]), (True, "Valid"))
+        self.assertNotIn("fen", response)
+        response = await self.request(op="move", game=game, move=[6, 4, 4, 4], id=7)
+        self.assertTrue(response["valid"])
+        self.assertEqual((response["player"], response["id"]), ("BLACK", 7))
+        response = await self.request(op="move", game=game, move=[6, 3, 4, 3])
+        self.assertEqual((response["ok"], response["valid"], response["validity"]), (True, False, "Invalid"))
+        self.assertNotIn("fen", response)
+
+    async def test_game_over(self):
+        game = await self.new_game()
+        for move in ([6, 5, 5, 5], [1, 4, 3, 4], [6, 6, 4, 6], [0, 3, 4, 7]):
+            response = await self.request(op="move", game=game, move=move)
+        self.assertEqual(response["outcome"], "checkmate")
+        response = await self.request(op="moves", game=game)
+        self.assertEqual(response["moves"], [])
+
+    async def test_undo_moves_state_close(self):
+        game = await self.new_game()
+        response = await self.request(op="moves", game=game)
+        self.assertEqual(len(response["moves"]), 20)
+        self.assertIn([7, 6, 5, 5], response["moves"])
+        start = (await self.request(op="state", game=game))["fen"]
+        await self.request(op="move", game=game, move=[7, 6, 5, 5])
+        response = await self.request(op="undo", game=game)
+        self.assertEqual((response["ok"], response["fen"]), (True, start))
+        response = await self.request(op="undo", game=game)
+        self.assertFalse(response["ok"])
+        self.assertEqual(await self.request(op="close", game=game), {"ok": True})
+        self.assertEqual(await self.request(op="state", game=game), {"ok": False, "error": "no such game"})
+
+    async def test_errors(self):
+        game = await self.new_game()
+        self.assertEqual(await self.server.handle_line(b"{not json"),
+                         {"ok": False, "error": "request is not valid JSON"})
+        self.assertEqual(await self.server.handle_line(b"[1, 2]"),
+                         {"ok": False, "error": "request must be a JSON object"})
+        bad = [
+            {"op": "new", "fen": 3},
+            {"op": "new", "fen": "8/8 w - - 0 1"},
+            {"op": "move", "game": game, "move": [6, 4, 4]},
+            {"op": "move", "game": game, "move": "e2e4"},
+            {"op": "move", "game": str(game), "move": [6, 4, 4, 4]},
+            {"op": "state", "game": 999},
+            {"op": "fly", "game": game},
+            {"op": "metrics"},
+        ]
+        for fields in bad:
+            response = await self.request(id="x", **fields)
+            self.assertEqual((response["ok"], response["id"]), (False, "x"), fields)
+            self.assertIsInstance(response["error"], str)
+
+    async def test_evict_idle(self):
+        idle, busy, fresh = [await self.new_game() for _ in range(3)]
+        for game in (idle, busy):
+            self.server.sessions[game].last_used = time.monotonic() - 120
+        # a game with a request in progress stays
+        async with self.server.sessions[busy].lock:
+            self.assertEqual(self.server.evict_idle(), 1)
+        self.assertEqual(sorted(self.server.sessions), [busy, fresh])
+        self.assertEqual(self.server.evict_idle(), 1)
+        self.assertEqual(list(self.server.sessions), [fresh])
+
+    async def test_metrics(self):
+        self.server = GameServer(instrumentation=Instrumentation())
+        game = await self.new_game()
+        await self.request(op="validity", game=game, move=[6, 4, 4, 4])
+        response = await self.request(op="metrics")
+        self.assertTrue(response["ok"])
+        response = await self.request(op="metrics", format="prometheus")
+        self.assertIsInstance(response["metrics"], str)
+
+    async def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "games.sock")
+            await self.server.start(path=path)
+            client = await GameClient.connect(path=path)
+            try:
+                game = (await client.request("new"))["game"]
+                response = await client.request("move", game=game, move=[6, 4, 4, 4], id=1)
+                self.assertEqual((response["valid"], response["id"]), (True, 1))
+                client.writer.write(b"nonsense\n")
+                await client.writer.drain()
+                self.assertFalse(json.loads(await client.reader.readline())["ok"])
+                self.assertEqual((await client.request("state", game=game))["player"], "BLACK")
+            finally:
+                await client.close()
+                await self.server.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
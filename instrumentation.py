@@ -0,0 +1,86 @@
+import time
+from chess_model import ChessModel
+
+# Methods timed by default. Times are inclusive: move() calls is_complete(),
+# so the time of that is_complete() call shows up under both.
+METHODS = ("is_valid_move", "in_check", "is_complete", "move", "undo")
+
+
+class Instrumentation:
+    """Call counts, cumulative time and board copies for ChessModel instances.
+
+    Nothing is patched on the ChessModel class. attach() wraps the methods of
+    one instance, so models that are not attached run the plain methods and
+    pay nothing. One Instrumentation can be attached to many models, and
+    their counts add up.
+    """
+
+    def __init__(self, methods=METHODS):
+        self.methods = tuple(methods)
+        self.calls = dict.fromkeys(self.methods, 0)
+        self.seconds = dict.fromkeys(self.methods, 0.0)
+        self.board_copies = 0
+
+    def attach(self, model: ChessModel) -> ChessModel:
+        for name in self.methods:
+            setattr(model, name, self.__timed(name, getattr(model, name)))
+        copy_board = model.copy_board
+
+        def counted_copy_board():
+            self.board_copies += 1
+            return copy_board()
+
+        model.copy_board = counted_copy_board
+        return model
+
+    def detach(self, model: ChessModel):
+        # the instance attributes shadow the class methods; removing them
+        # puts the plain methods back
+        for name in self.methods + ("copy_board",):
+            model.__dict__.pop(name, None)
+
+    def __timed(self, name: str, method):
+        calls, seconds = self.calls, self.seconds
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                seconds[name] += perf_counter() - start
+                calls[name] += 1
+
+        timed.__wrapped__ = method
+        return timed
+
+    def reset(self):
+        for name in self.methods:
+            self.calls[name] = 0
+            self.seconds[name] = 0.0
+        self.board_copies = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "methods": {name: {"calls": self.calls[name], "seconds": self.seconds[name]} for name in self.methods},
+            "board_copies": self.board_copies,
+        }
+
+    def prometheus(self, prefix: str = "chess_model") -> str:
+        """The counters in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {prefix}_calls_total Calls per ChessModel method.",
+            f"# TYPE {prefix}_calls_total counter",
+        ]
+        lines += [f'{prefix}_calls_total{{method="{name}"}} {self.calls[name]}' for name in self.methods]
+        lines += [
+            f"# HELP {prefix}_seconds_total Time spent per ChessModel method, nested calls included.",
+            f"# TYPE {prefix}_seconds_total counter",
+        ]
+        lines += [f'{prefix}_seconds_total{{method="{name}"}} {self.seconds[name]:.9f}' for name in self.methods]
+        lines += [
+            f"# HELP {prefix}_board_copies_total Full board copies made.",
+            f"# TYPE {prefix}_board_copies_total counter",
+            f"{prefix}_board_copies_total {self.board_copies}",
+        ]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,84 @@
+import re
+import unittest
+from chess_model import ChessModel
+from instrumentation import METHODS, Instrumentation
+from move import Move
+
+SAMPLE = re.compile(r'([a-z_]+)(?:\{method="([a-z_]+)"\})? ([0-9.]+)$')
+
+
+def play(model: ChessModel):
+    """Check every legal move, play a few plies and take them back."""
+    for move in (Move(6, 4, 4, 4), Move(1, 4, 3, 4), Move(7, 6, 5, 5)):
+        for candidate in list(model.legal_moves()):
+            model.is_valid_move(candidate)
+        model.move(move)
+    model.undo()
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_counts_calls_and_time(self):
+        instrumentation = Instrumentation()
+        model = instrumentation.attach(ChessModel())
+        play(model)
+        self.assertEqual(instrumentation.calls["move"], 3)
+        self.assertEqual(instrumentation.calls["undo"], 1)
+        self.assertEqual(instrumentation.calls["is_valid_move"], 20 + 20 + 29)
+        self.assertGreater(instrumentation.seconds["is_valid_move"], 0)
+        self.assertEqual(instrumentation.snapshot()["methods"]["move"], {"calls": 3, "seconds": instrumentation.seconds["move"]})
+        instrumentation.reset()
+        self.assertEqual(set(instrumentation.calls.values()), {0})
+
+    def test_board_copies_by_check_mode(self):
+        copies = {}
+        for check_mode in ("copy", "rays"):
+            instrumentation = Instrumentation()
+            play(instrumentation.attach(ChessModel(check_mode=check_mode)))
+            copies[check_mode] = instrumentation.board_copies
+        self.assertGreater(copies["copy"], 0)
+        self.assertEqual(copies["rays"], 0)
+
+    def test_models_add_up(self):
+        instrumentation = Instrumentation(["move"])
+        for _ in range(2):
+            instrumentation.attach(ChessModel()).move(Move(6, 4, 4, 4))
+        self.assertEqual(instrumentation.calls, {"move": 2})
+
+    def test_detach(self):
+        instrumentation = Instrumentation()
+        model = instrumentation.attach(ChessModel(check_mode="copy"))
+        instrumentation.detach(model)
+        for name in METHODS + ("copy_board",):
+            self.assertEqual(getattr(model, name).__func__, getattr(ChessModel, name))
+        play(model)
+        self.assertEqual(set(instrumentation.calls.values()), {0})
+        self.assertEqual(instrumentation.board_copies, 0)
+
+    def test_prometheus(self):
+        instrumentation = Instrumentation()
+        play(instrumentation.attach(ChessModel(check_mode="copy")))
+        text = instrumentation.prometheus()
+        self.assertTrue(text.endswith("\n"))
+        typed = set()
+        samples = {}
+        for line in text.splitlines():
+            if line.startswith("# HELP "):
+                continue
+            if line.startswith("# TYPE "):
+                name, kind = line.split()[2:]
+                self.assertEqual(kind, "counter")
+                typed.add(name)
+                continue
+            match = SAMPLE.match(line)
+            self.assertIsNotNone(match, line)
+            name, method, value = match.groups()
+            # every sample comes after its TYPE line
+            self.assertIn(name, typed)
+            samples[name, method] = float(value)
+        self.assertEqual(samples["chess_model_calls_total", "move"], 3)
+        self.assertEqual(samples["chess_model_board_copies_total", None], instrumentation.board_copies)
+        self.assertEqual({method for name, method in samples if name == "chess_model_seconds_total"}, set(METHODS))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from game_server import GameClient
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class StartLine:
+    """Holds every session back until all of them have opened their game."""
+
+    def __init__(self, sessions: int):
+        self.waiting = sessions
+        self.event = asyncio.Event()
+        self.connecting = asyncio.Semaphore(64)
+
+    def arrive(self):
+        self.waiting -= 1
+        if self.waiting == 0:
+            self.event.set()
+
+
+async def play_session(connect, plies: int, rng: random.Random, latencies: list, start: StartLine):
+    """Open a game and play random legal moves, timing each move request."""
+    try:
+        # a few connections at a time, so the listener's backlog never overflows
+        async with start.connecting:
+            client = await connect()
+    except BaseException:
+        start.arrive()
+        raise
+    try:
+        try:
+            game = (await client.request("new"))["game"]
+        finally:
+            start.arrive()
+        # so the moves of all sessions run concurrently
+        await start.event.wait()
+        for _ in range(plies):
+            moves = (await client.request("moves", game=game))["moves"]
+            if not moves:
+                break
+            sent = time.perf_counter()
+            response = await client.request("move", game=game, move=rng.choice(moves))
+            latencies.append(time.perf_counter() - sent)
+            if not response["ok"] or response.get("outcome"):
+                break
+        await client.request("close", game=game)
+    finally:
+        await client.close()
+
+
+async def run_load(sessions: int, plies: int, connect, seed: int = 0) -> tuple:
+    """Per-move latencies (sorted) and wall time for sessions concurrent games."""
+    latencies = []
+    start = StartLine(sessions)
+    rng = random.Random(seed)
+    tasks = [asyncio.create_task(play_session(connect, plies, random.Random(rng.random()), latencies, start))
+             for _ in range(sessions)]
+    await start.event.wait()
+    began = time.perf_counter()
+    await asyncio.gather(*tasks)
+    return sorted(latencies), time.perf_counter() - began
+
+
+async def spawn_server(path: str) -> asyncio.subprocess.Process:
+    """Start game_server.py on a Unix socket in its own process."""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "game_server.py")
+    process = await asyncio.create_subprocess_exec(sys.executable, script, "--unix", path,
+                                                   stdout=asyncio.subprocess.PIPE)
+    # the server prints one line once it is listening
+    await process.stdout.readline()
+    return process
+
+
+async def main_async(args) -> int:
+    process = None
+    # a spawned server's socket lives in a directory removed after the run
+    directory = None
+    if args.unix or args.port:
+        path = args.unix
+    else:
+        directory = tempfile.TemporaryDirectory()
+        path = os.path.join(directory.name, "games.sock")
+        process = await spawn_server(path)
+
+    async def connect():
+        return await GameClient.connect(args.host, args.port, path)
+
+    try:
+        latencies, seconds = await run_load(args.sessions, args.plies, connect, args.seed)
+    finally:
+        if process is not None:
+            process.terminate()
+            await process.wait()
+        if directory is not None:
+            directory.cleanup()
+
+    print(f"{args.sessions} sessions, {len(latencies)} moves in {seconds:.2f}s ({len(latencies) / seconds:.0f} moves/s)")
+    print(f"move latency  p50 {percentile(latencies, 0.50) * 1e3:8.2f} ms"
+          f"  p99 {percentile(latencies, 0.99) * 1e3:8.2f} ms"
+          f"  max {percentile(latencies, 1.0) * 1e3:8.2f} ms")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test for game_server.py")
+    parser.add_argument("--sessions", type=int, default=1000, help="concurrent games, one connection each")
+    parser.add_argument("--plies", type=int, default=20, help="moves played per game")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="use a running server on TCP")
+    parser.add_argument("--unix", help="use a running server on this Unix socket")
+    args = parser.parse_args()
+    # without --port or --unix a server is started locally for the run
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+from array import array
+from bitboard import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, WHITE
+
+# Moves are packed into 12 bits: from_square << 6 | to_square. A move list is
+# a preallocated array of those codes that the generator overwrites, so a
+# search can reuse one list per ply instead of building Move objects.
+MAX_MOVES = 256
+
+KNIGHT_OFFSETS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+KING_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+ROOK_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+BISHOP_DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+
+def _targets(square: int, offsets) -> int:
+    row, col = divmod(square, 8)
+    mask = 0
+    for row_step, col_step in offsets:
+        to_row, to_col = row + row_step, col + col_step
+        if 0 <= to_row < 8 and 0 <= to_col < 8:
+            mask |= 1 << (to_row * 8 + to_col)
+    return mask
+
+
+def _rays(square: int, directions) -> tuple:
+    row, col = divmod(square, 8)
+    rays = []
+    for row_step, col_step in directions:
+        ray = []
+        to_row, to_col = row + row_step, col + col_step
+        while 0 <= to_row < 8 and 0 <= to_col < 8:
+            ray.append(to_row * 8 + to_col)
+            to_row += row_step
+            to_col += col_step
+        if ray:
+            rays.append(tuple(ray))
+    return tuple(rays)
+
+
+KNIGHT_TARGETS = tuple(_targets(square, KNIGHT_OFFSETS) for square in range(64))
+KING_TARGETS = tuple(_targets(square, KING_OFFSETS) for square in range(64))
+# White pawns move toward row 0, black pawns toward row 7
+PAWN_CAPTURES = (
+    tuple(_targets(square, ((-1, -1), (-1, 1))) for square in range(64)),
+    tuple(_targets(square, ((1, -1), (1, 1))) for square in range(64)),
+)
+ROOK_RAYS = tuple(_rays(square, ROOK_DIRECTIONS) for square in range(64))
+BISHOP_RAYS = tuple(_rays(square, BISHOP_DIRECTIONS) for square in range(64))
+QUEEN_RAYS = tuple(ROOK_RAYS[square] + BISHOP_RAYS[square] for square in range(64))
+
+
+def new_move_list() -> array:
+    return array("H", bytes(2 * MAX_MOVES))
+
+
+def generate(board, color: int, moves: array) -> int:
+    """Write the pseudo-legal moves of color into moves and return the count.
+
+    Pseudo-legal moves follow the piece rules but may leave the mover's own
+    king in check; the caller filters those out.
+    """
+    own = board.colors[color]
+    enemy = board.colors[color ^ 1]
+    occupied = board.occupied
+    pieces = board.pieces
+    base = color * 6
+    count = 0
+
+    # Pawns: one step forward, two from the starting row, diagonal captures
+    if color == WHITE:
+        step, start_low, start_high = -8, 48, 56
+    else:
+        step, start_low, start_high = 8, 8, 16
+    captures = PAWN_CAPTURES[color]
+    pawns = pieces[base + PAWN]
+    while pawns:
+        low = pawns & -pawns
+        pawns ^= low
+        square = low.bit_length() - 1
+        to_square = square + step
+        if 0 <= to_square < 64 and not occupied >> to_square & 1:
+            moves[count] = square << 6 | to_square
+            count += 1
+            to_square += step
+            if start_low <= square < start_high and not occupied >> to_square & 1:
+                moves[count] = square << 6 | to_square
+                count += 1
+        targets = captures[square] & enemy
+        while targets:
+            low = targets & -targets
+            targets ^= low
+            moves[count] = square << 6 | (low.bit_length() - 1)
+            count += 1
+
+    # Knights and kings: precomputed target masks
+    for kind, table in ((KNIGHT, KNIGHT_TARGETS), (KING, KING_TARGETS)):
+        bb = pieces[base + kind]
+        while bb:
+            low = bb & -bb
+            bb ^= low
+            square = low.bit_length() - 1
+            targets = table[square] & ~own
+            while targets:
+                low = targets & -targets
+                targets ^= low
+                moves[count] = square << 6 | (low.bit_length() - 1)
+                count += 1
+
+    # Sliders: walk each ray until the first occupied square
+    for kind, table in ((BISHOP, BISHOP_RAYS), (ROOK, ROOK_RAYS), (QUEEN, QUEEN_RAYS)):
+        bb = pieces[base + kind]
+        while bb:
+            low = bb & -bb
+            bb ^= low
+            square = low.bit_length() - 1
+            for ray in table[square]:
+                for to_square in ray:
+                    if occupied >> to_square & 1:
+                        if enemy >> to_square & 1:
+                            moves[count] = square << 6 | to_square
+                            count += 1
+                        break
+                    moves[count] = square << 6 | to_square
+                    count += 1
+
+    return count
+
+
+def square_attacked(board, square: int, color: int, occupied: int = None, removed: int = 0) -> bool:
+    """Whether any piece of color attacks square.
+
+    Looks outward from the square with each piece's movement pattern, so only
+    the few squares that could hold an attacker are examined. occupied and
+    removed let a caller ask about a position one move ahead without touching
+    the board: occupied replaces the occupancy bitboard and attackers on the
+    squares in removed (a captured piece) are ignored.
+    """
+    pieces = board.pieces
+    base = color * 6
+    keep = ~removed
+    if KNIGHT_TARGETS[square] & pieces[base + KNIGHT] & keep:
+        return True
+    if KING_TARGETS[square] & pieces[base + KING] & keep:
+        return True
+    # a pawn attacks square exactly when a pawn of the other color standing
+    # on square could capture it
+    if PAWN_CAPTURES[color ^ 1][square] & pieces[base + PAWN] & keep:
+        return True
+    if occupied is None:
+        occupied = board.occupied
+    queens = pieces[base + QUEEN]
+    for sliders, rays in ((pieces[base + ROOK] | queens, ROOK_RAYS), (pieces[base + BISHOP] | queens, BISHOP_RAYS)):
+        sliders &= keep
+        if not sliders:
+            continue
+        for ray in rays[square]:
+            for to_square in ray:
+                if occupied >> to_square & 1:
+                    if sliders >> to_square & 1:
+                        return True
+                    break
+    return False
+
+
+def attack_map(board, color: int) -> int:
+    """Bitboard of every square attacked by color."""
+    pieces = board.pieces
+    occupied = board.occupied
+    base = color * 6
+    attacked = 0
+    for kind, table in ((PAWN, PAWN_CAPTURES[color]), (KNIGHT, KNIGHT_TARGETS), (KING, KING_TARGETS)):
+        bb = pieces[base + kind]
+        while bb:
+            low = bb & -bb
+            bb ^= low
+            attacked |= table[low.bit_length() - 1]
+    for kind, table in ((BISHOP, BISHOP_RAYS), (ROOK, ROOK_RAYS), (QUEEN, QUEEN_RAYS)):
+        bb = pieces[base + kind]
+        while bb:
+            low = bb & -bb
+            bb ^= low
+            for ray in table[low.bit_length() - 1]:
+                for to_square in ray:
+                    attacked |= 1 << to_square
+                    if occupied >> to_square & 1:
+                        break
+    return attacked
@@ -0,0 +1,149 @@
+import argparse
+from array import array
+import mmap
+import random
+import struct
+import sys
+from bisect import bisect_left
+from chess_model import ChessModel
+from chess_search import code_to_move
+from fen import STANDARD_FEN, load_fen
+from pgn import read_games, resolve_san
+
+# File layout, little-endian (memory-mapped as native arrays, so the book is
+# read on little-endian machines):
+#   header   MAGIC (8 bytes), entry count (u64)
+#   keys     count x u64 Zobrist hashes, sorted ascending
+#   entries  count x u32, packed move code << 16 | weight
+# A position with several book moves has one entry per move, side by side.
+MAGIC = b"CHESSBK1"
+HEADER = struct.Struct("<8sQ")
+
+
+class OpeningBook:
+    """Read-only opening book memory-mapped from a file built by build_book.
+
+    Opening costs no parsing: the keys are binary searched in place through
+    the map, and only the pages touched by a lookup are read from disk.
+    """
+
+    def __init__(self, path: str):
+        self.__file = open(path, "rb")
+        self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self.__map)
+        if magic != MAGIC:
+            self.__map.close()
+            self.__file.close()
+            raise ValueError(f"{path} is not an opening book")
+        self.__view = memoryview(self.__map)
+        start = HEADER.size
+        self.__keys = self.__view[start:start + 8 * count].cast("Q")
+        self.__entries = self.__view[start + 8 * count:start + 12 * count].cast("I")
+
+    def __len__(self) -> int:
+        return len(self.__keys)
+
+    def lookup(self, key: int) -> list:
+        """(move code, weight) pairs stored for a Zobrist hash."""
+        keys = self.__keys
+        index = bisect_left(keys, key)
+        found = []
+        while index < len(keys) and keys[index] == key:
+            entry = self.__entries[index]
+            found.append((entry >> 16, entry & 0xFFFF))
+            index += 1
+        return found
+
+    def __contains__(self, model: ChessModel) -> bool:
+        keys = self.__keys
+        key = model.zobrist_hash
+        index = bisect_left(keys, key)
+        return index < len(keys) and keys[index] == key
+
+    def choose(self, model: ChessModel, rng: random.Random = None):
+        """A book move for the position, picked at random by weight, or None."""
+        entries = self.lookup(model.zobrist_hash)
+        # a hash collision could name a move that is illegal here
+        entries = [(code, weight) for code, weight in entries if model.is_valid_move(code_to_move(code))]
+        if not entries:
+            return None
+        rng = rng or random
+        pick = rng.randrange(sum(weight for _, weight in entries))
+        for code, weight in entries:
+            pick -= weight
+            if pick < 0:
+                return code_to_move(code)
+
+    def close(self):
+        if self.__map is not None:
+            # the map can only close once no views point into it
+            self.__keys.release()
+            self.__entries.release()
+            self.__view.release()
+            self.__map.close()
+            self.__file.close()
+            self.__map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_book(pgn_paths: list, book_path: str, plies: int = 20, min_count: int = 1) -> int:
+    """Compile the first plies moves of every game into a book file.
+
+    Moves are weighted by how often they were played in a position; moves
+    seen fewer than min_count times are left out. Returns the entry count.
+    """
+    counts = {}
+    model = ChessModel()
+    for path in pgn_paths:
+        for game in read_games(path):
+            load_fen(model, game.tags.get("FEN", STANDARD_FEN))
+            for san in game.moves[:plies]:
+                move, _ = resolve_san(model, san)
+                if move is None:
+                    break
+                code = (move.from_row * 8 + move.from_col) << 6 | (move.to_row * 8 + move.to_col)
+                entry = (model.zobrist_hash, code)
+                counts[entry] = counts.get(entry, 0) + 1
+                model.move(move)
+
+    book = sorted((key, code, count) for (key, code), count in counts.items() if count >= min_count)
+    with open(book_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(book)))
+        array("Q", (key for key, _, _ in book)).tofile(file)
+        array("I", (code << 16 | min(count, 0xFFFF) for _, code, count in book)).tofile(file)
+    return len(book)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build or query a ChessModel opening book")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="compile PGN files into a book")
+    build.add_argument("book")
+    build.add_argument("pgn", nargs="+")
+    build.add_argument("--plies", type=int, default=20)
+    build.add_argument("--min-count", type=int, default=1)
+    probe = commands.add_parser("probe", help="list the book moves for a position")
+    probe.add_argument("book")
+    probe.add_argument("--fen", default=STANDARD_FEN)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        entries = build_book(args.pgn, args.book, args.plies, args.min_count)
+        print(f"{entries} entries written to {args.book}")
+        return 0
+
+    model = ChessModel()
+    load_fen(model, args.fen)
+    with OpeningBook(args.book) as book:
+        for code, weight in book.lookup(model.zobrist_hash):
+            print(f"{code_to_move(code)}  weight {weight}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import os
+import random
+import tempfile
+import unittest
+from array import array
+from chess_model import ChessModel
+from move import Move
+from opening_book import HEADER, OpeningBook, build_book
+
+PGN = """[Event "1"]
+
+1. e4 e5 2. Nf3 Nc6 *
+
+[Event "2"]
+
+1. e4 e5 2. Nf3 Nf6 *
+
+[Event "3"]
+
+1. e4 e5 2. Bc4 *
+
+[Event "4"]
+
+1. d4 d5 *
+
+[Event "5, stops at the illegal move"]
+
+1. c4 Ke3 *
+"""
+
+
+def code(move: Move) -> int:
+    return (move.from_row * 8 + move.from_col) << 6 | (move.to_row * 8 + move.to_col)
+
+
+E4, D4, C4, E5 = Move(6, 4, 4, 4), Move(6, 3, 4, 3), Move(6, 2, 4, 2), Move(1, 4, 3, 4)
+
+
+class TestOpeningBook(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pgn = os.path.join(self.directory.name, "games.pgn")
+        with open(self.pgn, "w") as file:
+            file.write(PGN)
+        self.path = os.path.join(self.directory.name, "book.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_weights(self):
+        self.assertEqual(build_book([self.pgn], self.path, plies=3), 7)
+        model = ChessModel()
+        with OpeningBook(self.path) as book:
+            self.assertEqual(len(book), 7)
+            self.assertEqual(sorted(book.lookup(model.zobrist_hash)), sorted([(code(E4), 3), (code(D4), 1), (code(C4), 1)]))
+            model.move(E4)
+            self.assertEqual(book.lookup(model.zobrist_hash), [(code(E5), 3)])
+            model.move(E5)
+            self.assertEqual(len(book.lookup(model.zobrist_hash)), 2)
+            # only the first three plies went into the book
+            model.move(Move(7, 6, 5, 5))
+            self.assertEqual(book.lookup(model.zobrist_hash), [])
+            self.assertNotIn(model, book)
+
+    def test_min_count(self):
+        self.assertEqual(build_book([self.pgn], self.path, plies=3, min_count=2), 3)
+        with OpeningBook(self.path) as book:
+            self.assertEqual(book.lookup(ChessModel().zobrist_hash), [(code(E4), 3)])
+
+    def test_lookup_every_key(self):
+        build_book([self.pgn], self.path)
+        with open(self.path, "rb") as file:
+            _, count = HEADER.unpack(file.read(HEADER.size))
+            keys = array("Q")
+            keys.fromfile(file, count)
+        self.assertEqual(list(keys), sorted(keys))
+        with OpeningBook(self.path) as book:
+            for key in keys:
+                self.assertTrue(book.lookup(key))
+            # before the first key, after the last and between two
+            for key in (0, keys[0] - 1, keys[-1] + 1, 2 ** 64 - 1, keys[0] + 1):
+                if key not in keys:
+                    self.assertEqual(book.lookup(key), [])
+
+    def test_choose(self):
+        build_book([self.pgn], self.path)
+        model = ChessModel()
+        with OpeningBook(self.path) as book:
+            picks = [book.choose(model, random.Random(seed)) for seed in range(20)]
+            self.assertEqual(picks, [book.choose(model, random.Random(seed)) for seed in range(20)])
+            self.assertEqual({code(move) for move in picks}, {code(E4), code(D4), code(C4)})
+            model.move(Move(6, 7, 5, 7))
+            self.assertIsNone(book.choose(model, random.Random(0)))
+
+    def test_bad_magic(self):
+        with open(self.path, "wb") as file:
+            file.write(HEADER.pack(b"NOTABOOK", 0))
+        with self.assertRaises(ValueError):
+            OpeningBook(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
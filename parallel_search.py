@@ -0,0 +1,85 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from chess_model import ChessModel
+from chess_search import SearchEngine, SearchResult, code_to_move
+from fen import load_fen, to_fen
+from move_gen import new_move_list
+from transposition_table import TranspositionTable, table_bytes
+
+# Per-process state for pool workers, set up once by _start_worker
+_worker = {}
+
+
+def _start_worker(shared_name: str, megabytes: float):
+    memory = shared_memory.SharedMemory(name=shared_name)
+    _worker["memory"] = memory
+    _worker["table"] = TranspositionTable(megabytes, memory.buf)
+    _worker["model"] = ChessModel()
+
+
+def _search_share(task: tuple) -> tuple:
+    fen, depth, codes = task
+    model = _worker["model"]
+    load_fen(model, fen)
+    engine = SearchEngine(max_depth=depth, table=_worker["table"])
+    result = engine.search(model, root_moves=codes)
+    code = 0
+    if result.move is not None:
+        move = result.move
+        code = (move.from_row * 8 + move.from_col) << 6 | (move.to_row * 8 + move.to_col)
+    return result.score, code, result.depth, result.nodes
+
+
+class ParallelSearch:
+    """Root-split search: the root moves are dealt out to worker processes.
+
+    Every worker runs its own iterative-deepening search over its share of
+    the root moves. All workers read and write one transposition table in
+    shared memory, so a position one worker has searched is a table hit for
+    the others (lazy-SMP style, without locks).
+
+    Use as a context manager, or call close(), to stop the workers and free
+    the shared table.
+    """
+
+    def __init__(self, workers: int = 4, max_depth: int = 4, table_megabytes: float = 16):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.__megabytes = table_megabytes
+        self.__memory = shared_memory.SharedMemory(create=True, size=table_bytes(table_megabytes))
+        TranspositionTable(table_megabytes, self.__memory.buf).clear()
+        self.__pool = multiprocessing.Pool(workers, _start_worker, (self.__memory.name, table_megabytes))
+
+    def search(self, model: ChessModel) -> SearchResult:
+        start = time.perf_counter()
+        moves = new_move_list()
+        count = model.generate_moves(moves)
+        if count == 0:
+            return SearchEngine(max_depth=1).search(model)
+
+        # Deal the moves round-robin so each share gets a mix of good and bad ones
+        fen = to_fen(model)
+        shares = [list(moves[i:count:self.workers]) for i in range(min(self.workers, count))]
+        results = self.__pool.map(_search_share, [(fen, self.max_depth, share) for share in shares])
+
+        score, code, depth, _ = max(results, key=lambda result: result[0])
+        nodes = sum(result[3] for result in results)
+        return SearchResult(code_to_move(code), score, depth, nodes, time.perf_counter() - start)
+
+    def clear_table(self):
+        TranspositionTable(self.__megabytes, self.__memory.buf).clear()
+
+    def close(self):
+        if self.__pool is not None:
+            self.__pool.close()
+            self.__pool.join()
+            self.__pool = None
+            self.__memory.close()
+            self.__memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
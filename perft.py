@@ -0,0 +1,103 @@
+import argparse
+import sys
+import time
+from chess_model import ChessModel
+from fen import STANDARD_FEN, load_fen
+from move_gen import new_move_list
+
+# Leaf counts under ChessModel's rules: no castling, no en passant, and pawns
+# always promote to a queen. The standard position is unaffected by those
+# rules up to depth 4 and "Position 6" up to depth 3. "Position 3" gains two
+# en passant leaves at depth 3 in full chess; they are left out here.
+REFERENCE = (
+    ("start", STANDARD_FEN, (20, 400, 8902, 197281)),
+    ("position 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", (14, 191, 2810)),
+    ("position 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", (46, 2079, 89890)),
+)
+
+_move_lists = []
+
+
+def _move_list(ply: int):
+    while len(_move_lists) <= ply:
+        _move_lists.append(new_move_list())
+    return _move_lists[ply]
+
+
+def perft(model: ChessModel, depth: int, ply: int = 0) -> int:
+    """Number of leaf nodes depth plies below the current position."""
+    if depth == 0:
+        return 1
+    moves = _move_list(ply)
+    count = model.generate_moves(moves)
+    if depth == 1:
+        return count
+    nodes = 0
+    for i in range(count):
+        code = moves[i]
+        model.make_move(code >> 6, code & 63)
+        nodes += perft(model, depth - 1, ply + 1)
+        model.undo()
+    return nodes
+
+
+def square_name(square: int) -> str:
+    return "abcdefgh"[square & 7] + str(8 - (square >> 3))
+
+
+def divide(model: ChessModel, depth: int) -> dict:
+    """Leaf counts below each root move, keyed by coordinate notation (e2e4)."""
+    moves = new_move_list()
+    count = model.generate_moves(moves)
+    counts = {}
+    for i in range(count):
+        code = moves[i]
+        model.make_move(code >> 6, code & 63)
+        counts[square_name(code >> 6) + square_name(code & 63)] = perft(model, depth - 1, 1)
+        model.undo()
+    return counts
+
+
+def run(fen: str, depth: int, backend: str = "list", show_divide: bool = False):
+    model = ChessModel(backend)
+    load_fen(model, fen)
+    start = time.perf_counter()
+    if show_divide:
+        counts = divide(model, depth)
+        for move in sorted(counts):
+            print(f"{move}: {counts[move]}")
+        nodes = sum(counts.values())
+    else:
+        nodes = perft(model, depth)
+    seconds = time.perf_counter() - start
+    return nodes, seconds
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Perft node counts for ChessModel")
+    parser.add_argument("--fen", default=STANDARD_FEN)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--backend", default="list", choices=("list", "bitboard"))
+    parser.add_argument("--divide", action="store_true", help="print the count below each root move")
+    parser.add_argument("--check", action="store_true", help="run the reference positions instead")
+    args = parser.parse_args()
+
+    if not args.check:
+        nodes, seconds = run(args.fen, args.depth, args.backend, args.divide)
+        print(f"depth {args.depth}: {nodes} nodes in {seconds:.3f}s ({nodes / max(seconds, 1e-9):.0f} nodes/s)")
+        return 0
+
+    failures = 0
+    for name, fen, expected in REFERENCE:
+        for depth, want in enumerate(expected, start=1):
+            if depth > args.depth:
+                break
+            nodes, seconds = run(fen, depth, args.backend)
+            status = "ok" if nodes == want else f"FAIL (expected {want})"
+            failures += nodes != want
+            print(f"{name:12} depth {depth}: {nodes:8} nodes {nodes / max(seconds, 1e-9):10.0f} nodes/s  {status}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
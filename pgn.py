@@ -0,0 +1,250 @@
+import argparse
+import multiprocessing
+import os
+import re
+import sys
+from typing import NamedTuple
+from chess_model import ChessModel, MoveValidity
+from bitboard import PIECE_TYPES, color_of
+from move import Move
+from fen import STANDARD_FEN, load_fen
+
+SAN = re.compile(r"([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?[+#]?[!?]*$")
+MOVE_NUMBER = re.compile(r"\d+\.+")
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+PIECE_LETTERS = "PNBRQK"
+
+
+class PgnGame(NamedTuple):
+    # byte offset of the game's first line in the file
+    offset: int
+    tags: dict
+    moves: list
+
+
+class ReplayError(NamedTuple):
+    ply: int
+    san: str
+    validity: MoveValidity
+    detail: str
+
+
+class ReplayResult(NamedTuple):
+    offset: int
+    tags: dict
+    plies: int
+    error: ReplayError
+
+
+def _clean_movetext(line: str, depth: list) -> str:
+    """Drop comments, variations and NAGs from one movetext line.
+
+    depth holds the open {comment} and (variation) nesting carried over from
+    earlier lines: depth[0] for braces, depth[1] for parentheses.
+    """
+    if not depth[0] and not depth[1] and not any(c in line for c in "{(;$"):
+        return line
+    kept = []
+    for char in line:
+        if depth[0]:
+            if char == "}":
+                depth[0] = 0
+        elif char == "{":
+            depth[0] = 1
+        elif char == ";":
+            # a comment to the end of the line, inside a variation too; the
+            # variation stays open on the next line
+            break
+        elif char == "(":
+            depth[1] += 1
+        elif char == ")":
+            if depth[1]:
+                depth[1] -= 1
+        elif not depth[1]:
+            kept.append(char)
+    return re.sub(r"\$\d+", " ", "".join(kept))
+
+
+def _line_before(file, offset: int) -> bytes:
+    # The line ending just before offset (a line start), read backward in
+    # blocks; None at the start of the file
+    if offset == 0:
+        return None
+    end = offset - 1
+    position = end
+    data = b""
+    while position > 0 and b"\n" not in data:
+        step = min(4096, position)
+        position -= step
+        file.seek(position)
+        data = file.read(step) + data
+    file.seek(offset)
+    return data.rsplit(b"\n", 1)[-1]
+
+
+def read_games(path: str, start: int = 0, end: int = None):
+    """Yield the games of a PGN file one at a time.
+
+    Only the current game is held in memory. With start/end, yields just the
+    games whose first tag line begins in that byte range, so separate
+    processes can each take a slice of one file.
+    """
+    with open(path, "rb") as file:
+        previous_tag = False
+        if start:
+            file.seek(start - 1)
+            # a shard boundary usually lands mid-line: skip to the next line
+            file.readline()
+            before = _line_before(file, file.tell())
+            previous_tag = before is not None and before.strip().startswith(b"[")
+        offset = file.tell()
+        tags, moves, depth = None, None, [0, 0]
+        game_offset = 0
+
+        for raw in file:
+            line_offset = offset
+            offset += len(raw)
+            line = raw.decode("utf-8", "replace").strip()
+            if line.startswith("[") and not depth[0]:
+                # the first tag line of a block starts a new game
+                if not previous_tag:
+                    if tags is not None:
+                        yield PgnGame(game_offset, tags, moves)
+                    if end is not None and line_offset >= end:
+                        return
+                    tags, moves, depth = {}, [], [0, 0]
+                    game_offset = line_offset
+                previous_tag = True
+                if tags is not None:
+                    match = re.match(r'\[(\w+)\s+"(.*)"\]', line)
+                    if match:
+                        tags[match.group(1)] = match.group(2)
+                continue
+            previous_tag = False
+            if tags is None or not line or line.startswith("%"):
+                continue
+            for token in _clean_movetext(line, depth).split():
+                token = MOVE_NUMBER.sub("", token)
+                if token and token not in RESULTS:
+                    moves.append(token)
+
+        if tags is not None:
+            yield PgnGame(game_offset, tags, moves)
+
+
+def resolve_san(model: ChessModel, san: str):
+    """Turn a SAN move into a Move for the side to move.
+
+    Returns (move, None) when exactly one legal move matches, otherwise
+    (None, ReplayError fields as (validity, detail)).
+    """
+    if san.startswith("O-O") or san.startswith("0-0"):
+        return None, (MoveValidity.Invalid, "castling is not supported")
+    match = SAN.match(san)
+    if match is None:
+        return None, (MoveValidity.Invalid, "unreadable move")
+    letter, from_file, from_rank, target, promotion = match.groups()
+    if promotion and promotion != "Q":
+        return None, (MoveValidity.Invalid, "pawns only promote to a queen")
+
+    to_row = 8 - int(target[1])
+    to_col = ord(target[0]) - ord("a")
+    kind = color_of(model.current_player) * 6 + PIECE_LETTERS.index(letter or "P")
+    board = model.board
+    candidates = []
+    pieces = model.bitboards.pieces[kind]
+    while pieces:
+        low = pieces & -pieces
+        pieces ^= low
+        square = low.bit_length() - 1
+        row, col = square >> 3, square & 7
+        if from_file and col != ord(from_file) - ord("a"):
+            continue
+        if from_rank and row != 8 - int(from_rank):
+            continue
+        move = Move(row, col, to_row, to_col)
+        if board[row][col].is_valid_move(move, board):
+            candidates.append(move)
+
+    if not candidates:
+        return None, (MoveValidity.Invalid, f"no {PIECE_TYPES[kind % 6].__name__} can reach {target}")
+    legal = [move for move in candidates if model.is_valid_move(move)]
+    if len(legal) == 1:
+        return legal[0], None
+    if legal:
+        return None, (MoveValidity.Invalid, "ambiguous move")
+    # report why the (first) matching piece may not move there
+    model.is_valid_move(candidates[0])
+    return None, (model.messageCode, "own king would be in check")
+
+
+def replay(game: PgnGame, model: ChessModel = None) -> ReplayResult:
+    """Play a game through ChessModel and stop at the first illegal move."""
+    if model is None:
+        model = ChessModel()
+    load_fen(model, game.tags.get("FEN", STANDARD_FEN))
+    for ply, san in enumerate(game.moves):
+        move, problem = resolve_san(model, san)
+        if move is None:
+            return ReplayResult(game.offset, game.tags, ply, ReplayError(ply, san, *problem))
+        model.move(move)
+    return ReplayResult(game.offset, game.tags, len(game.moves), None)
+
+
+def validate(path: str, start: int = 0, end: int = None):
+    """Replay every game in a byte range, yielding a ReplayResult for each."""
+    model = ChessModel()
+    for game in read_games(path, start, end):
+        yield replay(game, model)
+
+
+def _validate_shard(task: tuple) -> tuple:
+    path, start, end = task
+    games, failures = 0, []
+    for result in validate(path, start, end):
+        games += 1
+        if result.error is not None:
+            failures.append(result)
+    return games, failures
+
+
+def validate_parallel(path: str, workers: int = None, shards: int = None):
+    """Validate a file split by byte offset across processes.
+
+    Yields (games, failures) per shard as shards finish.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    shards = shards or workers * 4
+    size = os.path.getsize(path)
+    bounds = [size * i // shards for i in range(shards + 1)]
+    tasks = [(path, bounds[i], bounds[i + 1]) for i in range(shards)]
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(_validate_shard, tasks)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Validate PGN games against ChessModel rules")
+    parser.add_argument("path")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--show", type=int, default=20, help="how many failures to print")
+    args = parser.parse_args()
+
+    games, failures = 0, []
+    if args.workers == 1:
+        shard_results = [_validate_shard((args.path, 0, None))]
+    else:
+        shard_results = validate_parallel(args.path, args.workers)
+    for shard_games, shard_failures in shard_results:
+        games += shard_games
+        failures.extend(shard_failures)
+
+    failures.sort(key=lambda result: result.offset)
+    for result in failures[:args.show]:
+        error = result.error
+        print(f"offset {result.offset}: ply {error.ply + 1} {error.san}: {error.validity} ({error.detail})")
+    print(f"{games} games, {len(failures)} with illegal moves")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
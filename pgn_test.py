@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+from chess_model import MoveValidity
+from pgn import read_games, replay, validate, validate_parallel
+
+PGN = """[Event "First"]
+[Site "?"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 {a comment
+over two lines} Nc6 3. Bb5 (3. Bc4 Bc5 (3... Nf6)) a6 $1 1-0
+
+[Event "Second"]
+[Result "0-1"]
+
+1. f3 e5 2. g4 Qh4# 0-1
+[Event "Third, no blank line before it"]
+[Result "*"]
+; a line comment
+1. d4 d5 2. Ke3 *
+
+[Event "Fourth"]
+[FEN "4k3/1P6/8/8/8/8/8/4K3 w - - 0 1"]
+[Result "*"]
+
+1. b8=Q+ Kd7 *
+"""
+
+
+class TestPgn(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "games.pgn")
+        with open(self.path, "w") as file:
+            file.write(PGN)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_games(self):
+        games = list(read_games(self.path))
+        self.assertEqual([game.tags["Event"] for game in games],
+                         ["First", "Second", "Third, no blank line before it", "Fourth"])
+        self.assertEqual(games[0].moves, ["e4", "e5", "Nf3", "Nc6", "Bb5", "a6"])
+        self.assertEqual(games[1].moves, ["f3", "e5", "g4", "Qh4#"])
+        self.assertEqual(games[2].moves, ["d4", "d5", "Ke3"])
+        with open(self.path, "rb") as file:
+            data = file.read()
+        for game in games:
+            self.assertTrue(data[game.offset:].startswith(b"[Event"))
+
+    def test_line_comment_in_variation(self):
+        # the ) after ; is comment text: the variation closes on the next line
+        path = os.path.join(self.directory.name, "comment.pgn")
+        with open(path, "w") as file:
+            file.write('[Event "Comment"]\n\n1. e4 (1. d4 ; best is d4) really\n) e5 *\n')
+        games = list(read_games(path))
+        self.assertEqual(games[0].moves, ["e4", "e5"])
+
+    def test_shard_boundaries(self):
+        # every split point gives each game to exactly one shard
+        games = list(read_games(self.path))
+        size = os.path.getsize(self.path)
+        for split in range(size + 1):
+            shards = list(read_games(self.path, 0, split)) + list(read_games(self.path, split, None))
+            self.assertEqual(shards, games, f"split at byte {split}")
+
+    def test_three_shards(self):
+        games = list(read_games(self.path))
+        size = os.path.getsize(self.path)
+        for first in range(0, size, 7):
+            for second in range(first, size, 11):
+                shards = (list(read_games(self.path, 0, first)) + list(read_games(self.path, first, second))
+                          + list(read_games(self.path, second, size)))
+                self.assertEqual(shards, games, f"splits at bytes {first} and {second}")
+
+    def test_replay(self):
+        results = list(validate(self.path))
+        self.assertEqual([result.error is None for result in results], [True, True, False, True])
+        error = results[2].error
+        self.assertEqual((error.ply, error.san), (2, "Ke3"))
+        self.assertEqual(error.validity, MoveValidity.Invalid)
+        self.assertEqual(results[3].plies, 2)
+
+    def test_replay_stops_at_illegal_move(self):
+        game = list(read_games(self.path))[1]
+        game = game._replace(moves=["e4", "e5", "Ke2", "Qh4", "Kf3", "Qf2", "Ke3"])
+        result = replay(game)
+        self.assertEqual(result.error.ply, 6)
+        self.assertEqual(result.error.validity, MoveValidity.MovingIntoCheck)
+
+    def test_validate_parallel(self):
+        shards = list(validate_parallel(self.path, workers=2, shards=9))
+        self.assertEqual(len(shards), 9)
+        self.assertEqual(sum(games for games, _ in shards), 4)
+        self.assertEqual(sum(len(failures) for _, failures in shards), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,34 @@
+from array import array
+from heapq import heappop, heappush
 from llstack import LLStack
 
+# Codes in the flat grid the solvers work on. Once a cell is reached it holds
+# the step that reached it instead of _OPEN.
+_WALL = 0
+_OPEN = 1
+_UP, _DOWN, _LEFT, _RIGHT = 2, 3, 4, 5
+_START = 6
+# a cell the iterative depth-first search has tried every step from
+_DONE = _RIGHT + 1
+# added to the codes of the cells the bidirectional search reaches from the exit
+_BACK = _START - _OPEN
+# Cost of stepping into a cell for the weighted solver: 0 for walls, the digit
+# for cells "1" to "9", and 1 for every other cell
+_COST_CODES = bytes(
+    0 if code == ord("x") else code - ord("0") if ord("1") <= code <= ord("9") else 1
+    for code in range(256)
+)
+# width of the heuristic and index fields in an A* heap entry
+_FIELD_BITS = 48
+_FIELD_MASK = (1 << _FIELD_BITS) - 1
+# every byte but the cost digits, to find whether a grid has any
+_NOT_DIGITS = bytes(code for code in range(256) if not ord("1") <= code <= ord("9"))
+# the grid text as the binary digits of the stored bitset, and back
+_BIT_DIGITS = bytes(ord("0") if code == ord("x") else ord("1") for code in range(256))
+_DIGIT_CELLS = bytes(_OPEN if code == ord("1") else _WALL for code in range(256))
+# bitset bytes unpacked at a time
+_UNPACK_BYTES = 1 << 12
+
 
 class InvalidCoordinateError(Exception):
     pass
@@ -19,26 +48,36 @@ class Maze:
         Indices of the entry point of the maze in the form (row, col).
     __exit : tuple
         Indices of the exit point of the maze in the form (row, col).
-    __grid : List[List[str]]
-        Underlying grid storing the maze. Spots with a 'o' are open and spots with an 'x' are walls.
+    __cells : bytes
+        The maze as a bitset, one bit per cell, set for open cells. It is laid out like the flat grid the solvers work on, wall padding included: cell (row, col) is bit (row + 1) * __width + col, counting from the most significant bit of the first byte.
+    __width : int
+        Number of cells in a padded row, one more than the number of columns.
+    __costs : bytes
+        Cost of stepping into each cell, one byte per cell in the same layout, 0 for walls. None if every cell costs 1.
+    __min_cost : int
+        Cost of the cheapest open cell, which scales the A* heuristic.
     __path : LLStack
         Path through the maze.
     __shortest_path : LLStack
         Shortest path through the maze.
+    __nodes_expanded : int
+        Number of cells the last solve_shortest call expanded.
     """
 
-    def __init__(self, grid: list, entry_loc: tuple, exit_loc: tuple):
+    def __init__(self, grid: list, entry_loc: tuple, exit_loc: tuple, costs: list = None):
         """
         Constructor for Maze.
 
         Parameters
         ----------
         grid : List[List[str]]
-            Underlying grid storing the maze.
+            Grid to build the maze from. Spots with an 'x' are walls and every other spot is open; spots with a digit from '1' to '9' cost that much to step into. The maze keeps its own compact copy, not the grid.
         entry_loc : tuple
             Indices of the entry point of the maze in the form (row, col).
         exit_loc : tuple
             Indices of the exit point of the maze in the form (row, col).
+        costs : List[List[int]], optional
+            Cost of stepping into each cell, integers from 1 to 255 in a matrix the same size as the grid, overriding the costs the grid gives. Only solve_shortest("astar") uses it.
         """
 
         # grid max dimensions is 3x3
@@ -72,11 +111,35 @@ class Maze:
             or grid[exit_loc[0]][exit_loc[1]] == "x"
         ):
             raise InvalidCoordinateError("Invalid exit coordinates.")
-        
-        for row in grid:
-            for cell in row:
-                if not isinstance(cell, str):
-                    raise TypeError
+
+        # joining the rows checks every cell is a string
+        text, width = self.__flat_text(grid)
+
+        if costs is not None:
+            if not isinstance(costs, list) or not all(isinstance(row, list) for row in costs):
+                raise TypeError("Costs must be a list of lists.")
+            if len(costs) != len(grid) or any(len(row) != len(grid[0]) for row in costs):
+                raise ValueError("Costs must be the same size as the grid.")
+            cell_costs = bytearray(text.translate(_COST_CODES))
+            for row, (cells, row_costs) in enumerate(zip(grid, costs)):
+                try:
+                    row_costs = bytes(row_costs)
+                except TypeError:
+                    raise TypeError("Costs must be integers.")
+                except ValueError:
+                    raise ValueError("Costs must be from 1 to 255.")
+                if 0 in row_costs:
+                    raise ValueError("Costs must be from 1 to 255.")
+                start = (row + 1) * width
+                row_costs = bytearray(row_costs)
+                for col, cell in enumerate(cells):
+                    if cell == "x":
+                        row_costs[col] = 0
+                cell_costs[start:start + width - 1] = row_costs
+            costs = bytes(cell_costs)
+        elif text.translate(None, _NOT_DIGITS):
+            costs = text.translate(_COST_CODES)
+        # otherwise every cell costs 1, and the bitset says all there is to know
 
         self.__nrows = len(grid)
         if grid:
@@ -85,9 +148,16 @@ class Maze:
             self.__ncols = 0
         self.__entry = entry_loc
         self.__exit = exit_loc
-        self.__grid = grid
+        self.__width = width
+        # the padded text as one big binary number, filled out to whole
+        # bytes with walls: base 2 converts in linear time
+        digits = text.translate(_BIT_DIGITS) + b"0" * (-len(text) % 8)
+        self.__cells = int(digits, 2).to_bytes(len(digits) // 8, "big")
+        self.__costs = costs
+        self.__min_cost = 1 if costs is None else min(set(costs) - {0})
         self.__path = None
         self.__shortest_path = None
+        self.__nodes_expanded = None
         self.__history = set()
 
     @property
@@ -177,7 +247,7 @@ class Maze:
             or value[0] >= self.__nrows
             or value[1] < 0
             or value[1] >= self.__ncols
-            or self.__grid[value[0]][value[1]] == "x"
+            or not self.__is_open(value)
         ):
             raise InvalidCoordinateError("Invalid entry coordinates.")
         self.__entry = value
@@ -213,7 +283,7 @@ class Maze:
             or value[0] >= self.__nrows
             or value[1] < 0
             or value[1] >= self.__ncols
-            or self.__grid[value[0]][value[1]] == "x"
+            or not self.__is_open(value)
         ):
             raise InvalidCoordinateError("Invalid exit coordinates.")
         self.__exit = value
@@ -244,16 +314,42 @@ class Maze:
 
         return self.__shortest_path
 
-    def solve(self):
+    @property
+    def nodes_expanded(self) -> int:
+        """
+        Number of cells the last solve_shortest call expanded, to compare the solve methods on the same maze.
+
+        Returns
+        ----------
+        int
+            Number of cells expanded, or None if solve_shortest has not been called.
+        """
+
+        return self.__nodes_expanded
+
+    def solve(self, method: str = "recursive"):
         """
         Top level method to solve the maze.
 
         If the maze has a solution, after calling this, __path should be updated to be an LLStack representing the valid path through the maze (with the exit cell being the node at the top of the stack and the entry cell being the node at the bottom of the stack).
         If the maze is not solveable, __path should continue to be None after calling this method.
 
-        This method should not use any loops.
+        The recursive method uses no loops. The iterative method walks the same depth-first search with an explicit stack, so it finds the same path without a recursion limit.
+
+        Parameters
+        ----------
+        method : str, optional
+            "recursive" (the default) or "iterative".
         """
 
+        if method == "iterative":
+            self.__path = self.__solve_iterative()
+            return
+        if method != "recursive":
+            raise ValueError(f"Unknown solve method: {method}")
+
+        # Start from an empty history so an earlier call cannot block cells
+        self.__history.clear()
         self.__path = LLStack()
         if self.__solve_helper(self.__entry):
             # manually reverse the stack
@@ -288,19 +384,19 @@ class Maze:
 
         # Recursive cases: try to move in all four directions
         row, col = loc
-        if row > 0 and self.__grid[row - 1][col] == "o":
+        if row > 0 and self.__is_open((row - 1, col)):
             if self.__solve_helper((row - 1, col)):
                 self.__path.push(loc)
                 return True
-        if row < self.__nrows - 1 and self.__grid[row + 1][col] == "o":
+        if row < self.__nrows - 1 and self.__is_open((row + 1, col)):
             if self.__solve_helper((row + 1, col)):
                 self.__path.push(loc)
                 return True
-        if col > 0 and self.__grid[row][col - 1] == "o":
+        if col > 0 and self.__is_open((row, col - 1)):
             if self.__solve_helper((row, col - 1)):
                 self.__path.push(loc)
                 return True
-        if col < self.__ncols - 1 and self.__grid[row][col + 1] == "o":
+        if col < self.__ncols - 1 and self.__is_open((row, col + 1)):
             if self.__solve_helper((row, col + 1)):
                 self.__path.push(loc)
                 return True
@@ -308,94 +404,340 @@ class Maze:
         return False
 
 
-    def solve_shortest(self):
+    def __solve_iterative(self) -> LLStack:
+        """
+        Depth-first search with an explicit stack, trying up, down, left and right in that order like __solve_helper.
+
+        Returns
+        ----------
+        LLStack
+            Path with the exit cell at the top of the stack and the entry cell at the bottom, or None if there is none.
         """
-        This method combines the helper methods to create the shortest path possible on the maze
+
+        cells, width = self.__open_cells()
+        steps = {_UP: -width, _DOWN: width, _LEFT: -1, _RIGHT: 1}
+        goal = self.__index(self.__exit, width)
+
+        # The stack holds the current path; each cell on it stores the next
+        # step to try, and keeps _DONE once it has tried them all, so a cell
+        # is never entered twice. It grows with the path, so it only gets as
+        # long as the grid on mazes that wind through every cell.
+        stack = array("i", [self.__index(self.__entry, width)])
+        push, pop = stack.append, stack.pop
+        cells[stack[0]] = _UP
+        while stack:
+            index = stack[-1]
+            if index == goal:
+                break
+            step = cells[index]
+            if step == _DONE:
+                pop()
+                continue
+            cells[index] = step + 1
+            neighbor = index + steps[step]
+            if cells[neighbor] == _OPEN:
+                cells[neighbor] = _UP
+                push(neighbor)
+
+        if not stack:
+            return None
+        path = LLStack()
+        for index in stack:
+            path.push((index // width - 1, index % width))
+        return path
+
+    def solve_shortest(self, method: str = "bfs"):
         """
-        # Dictionary for memoization
-        memo = {}
+        Find the shortest path through the maze.
 
-        # Clear the history set
-        self.__history.clear()
+        If the maze has a solution, after calling this, __shortest_path is an LLStack holding a shortest path through the maze (with the exit cell at the top of the stack and the entry cell at the bottom).
+        If the maze is not solveable, __shortest_path is None after calling this method.
 
-        # Find the shortest path
-        shortest_length = self.__shortest_path_helper(self.entry_coords, memo)
+        The bfs method is an iterative breadth-first search that counts every step as 1. The bidirectional method runs that search from the entry and the exit at once, a level at a time from whichever side has the smaller frontier, and stops where they meet. The astar method is an A* search that weighs each step by the cost of the cell it steps into, so its path is the cheapest one; with no digits and no cost matrix that is a shortest one too.
 
-        # If the shortest path is infinity, there is no path
-        if shortest_length == float("inf"):
+        Parameters
+        ----------
+        method : str, optional
+            "bfs" (the default), "bidirectional" or "astar".
+        """
+
+        if method == "bidirectional":
+            self.__shortest_path = self.__solve_bidirectional()
+            return
+        if method == "astar":
+            self.__shortest_path = self.__solve_astar()
+            return
+        if method != "bfs":
+            raise ValueError(f"Unknown solve method: {method}")
+
+        cells, width = self.__open_cells()
+        start = self.__index(self.__entry, width)
+        goal = self.__index(self.__exit, width)
+
+        # Each reached cell records the step that reached it, which makes
+        # the grid copy double as the parent array
+        cells[start] = _START
+        frontier = [start]
+        expanded = 0
+        while frontier and cells[goal] == _OPEN:
+            expanded += len(frontier)
+            following = []
+            push = following.append
+            for index in frontier:
+                neighbor = index - width
+                if cells[neighbor] == _OPEN:
+                    cells[neighbor] = _UP
+                    push(neighbor)
+                neighbor = index + width
+                if cells[neighbor] == _OPEN:
+                    cells[neighbor] = _DOWN
+                    push(neighbor)
+                neighbor = index - 1
+                if cells[neighbor] == _OPEN:
+                    cells[neighbor] = _LEFT
+                    push(neighbor)
+                neighbor = index + 1
+                if cells[neighbor] == _OPEN:
+                    cells[neighbor] = _RIGHT
+                    push(neighbor)
+            frontier = following
+
+        self.__nodes_expanded = expanded
+        if cells[goal] == _OPEN:
             self.__shortest_path = None
         else:
-            self.__shortest_path = LLStack()
-            # Push the entry spot to the shortest path
-            self.__shortest_path.push(self.entry_coords)
-            self.__make_shortest_path(self.entry_coords, shortest_length, memo)
-            self.__shortest_path.push(self.exit_coords)
+            self.__shortest_path = self.__trace_path(cells, goal, width)
 
-    def __shortest_path_helper(self, coords, memo):
+    def __solve_bidirectional(self) -> LLStack:
         """
-        This method finds the shortest coordinates and populates them into the memoization dictionary
-        :param coords: current set of coords
-        :param memo: current version of the memoization dictionary
+        Breadth-first search from the entry and the exit at once, expanding a whole level of the smaller frontier at a time.
+
+        Returns
+        ----------
+        LLStack
+            Shortest path with the exit cell at the top of the stack and the entry cell at the bottom, or None if there is none.
         """
 
-        # Base case: if the coords are the exit, return 0
-        if coords == self.exit_coords:
-            return 0
+        cells, width = self.__open_cells()
+        start = self.__index(self.__entry, width)
+        goal = self.__index(self.__exit, width)
+        if start == goal:
+            self.__nodes_expanded = 0
+            path = LLStack()
+            path.push(self.__entry)
+            return path
+
+        # Both sides record in the one grid copy the step that reached a
+        # cell, as in solve_shortest, the exit's side with codes _BACK
+        # higher. The first step one side finds into a cell the other side
+        # already has joins a shortest path: every cell nearer both ends was
+        # already reached by both sides.
+        cells[start] = _START
+        cells[goal] = _START + _BACK
+        frontiers = [[start], [goal]]
+        expanded = 0
+        meet = None
+        while meet is None and frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            base = 0 if side == 0 else _BACK
+            up, down, left, right = _UP + base, _DOWN + base, _LEFT + base, _RIGHT + base
+            # the codes the other side marks its cells with
+            low, high = (_UP + _BACK, _START + _BACK) if side == 0 else (_UP, _START)
+            frontier = frontiers[side]
+            following = []
+            push = following.append
+            for index in frontier:
+                neighbor = index - width
+                code = cells[neighbor]
+                if code == _OPEN:
+                    cells[neighbor] = up
+                    push(neighbor)
+                elif low <= code <= high:
+                    break
+                neighbor = index + width
+                code = cells[neighbor]
+                if code == _OPEN:
+                    cells[neighbor] = down
+                    push(neighbor)
+                elif low <= code <= high:
+                    break
+                neighbor = index - 1
+                code = cells[neighbor]
+                if code == _OPEN:
+                    cells[neighbor] = left
+                    push(neighbor)
+                elif low <= code <= high:
+                    break
+                neighbor = index + 1
+                code = cells[neighbor]
+                if code == _OPEN:
+                    cells[neighbor] = right
+                    push(neighbor)
+                elif low <= code <= high:
+                    break
+            else:
+                expanded += len(frontier)
+                frontiers[side] = following
+                continue
+            expanded += frontier.index(index) + 1
+            meet = (index, neighbor) if side == 0 else (neighbor, index)
+
+        self.__nodes_expanded = expanded
+        if meet is None:
+            return None
+        # the entry's half of the path, then on along the exit's half
+        path = self.__trace_path(cells, meet[0], width)
+        ahead = {_UP + _BACK: width, _DOWN + _BACK: -width, _LEFT + _BACK: 1, _RIGHT + _BACK: -1}
+        index = meet[1]
+        path.push((index // width - 1, index % width))
+        while cells[index] != _START + _BACK:
+            index += ahead[cells[index]]
+            path.push((index // width - 1, index % width))
+        return path
+
+    def __solve_astar(self) -> LLStack:
+        """
+        A* search weighted by the cost of each cell, with a heap for the open set and the Manhattan distance times the cheapest cell cost as the heuristic.
 
-        # Base case: if the coords are out of bounds or are a wall, return infinity
-        row, col = coords
-        if (
-            not (0 <= row < self.__nrows and 0 <= col < self.__ncols)
-            or self.__grid[row][col] == "x"
-        ):
-            return float("inf")
+        Returns
+        ----------
+        LLStack
+            Cheapest path with the exit cell at the top of the stack and the entry cell at the bottom, or None if there is none.
+        """
 
-        # Base case: if the coords are in the memoization dictionary, return the value
-        if coords in memo:
-            return memo[coords]
+        # Costs are read from the stored maze, not a copy of it: the cost
+        # bytes when the maze has them, otherwise one bit per cell
+        cells, weights, width = self.__cells, self.__costs, self.__width
+        start = self.__index(self.__entry, width)
+        goal = self.__index(self.__exit, width)
+        goal_row, goal_col = self.__exit[0] + 1, self.__exit[1]
+        # never more than the real cost of reaching the exit, so the first
+        # time the exit comes off the heap its path is a cheapest one
+        scale = self.__min_cost
+
+        # The cost of the cheapest way found to each reached cell, and the
+        # step that found it. Only reached cells have entries, and on the
+        # open grids A* is for that is a sliver of the maze.
+        best = {start: 0}
+        steps = {start: _START}
+        # Entries are estimate, heuristic and index packed into one int, so
+        # they order like the tuple (estimate, heuristic, index) at a fraction
+        # of its size: on equal estimates the cell nearer the exit goes first.
+        # A cell whose cost has since gone down is pushed again, and the stale
+        # entry is skipped when popped.
+        heap = [start]
+        expanded = 0
+        while heap:
+            entry = heappop(heap)
+            index = entry & _FIELD_MASK
+            cost = (entry >> 2 * _FIELD_BITS) - (entry >> _FIELD_BITS & _FIELD_MASK)
+            if cost != best[index]:
+                continue
+            expanded += 1
+            if index == goal:
+                break
+            for step, offset in ((_UP, -width), (_DOWN, width), (_LEFT, -1), (_RIGHT, 1)):
+                neighbor = index + offset
+                if weights is None:
+                    weight = cells[neighbor >> 3] >> (7 - (neighbor & 7)) & 1
+                else:
+                    weight = weights[neighbor]
+                if weight:
+                    reached = cost + weight
+                    known = best.get(neighbor)
+                    if known is None or reached < known:
+                        best[neighbor] = reached
+                        steps[neighbor] = step
+                        row, col = divmod(neighbor, width)
+                        heuristic = (abs(row - goal_row) + abs(col - goal_col)) * scale
+                        heappush(heap, (reached + heuristic) << 2 * _FIELD_BITS | heuristic << _FIELD_BITS | neighbor)
+
+        self.__nodes_expanded = expanded
+        if goal not in best:
+            return None
+        return self.__trace_path(steps, goal, width)
+
+    def __open_cells(self) -> tuple:
+        """
+        Flat copy of the grid for the solvers, with a wall all around it, unpacked from the bitset.
 
-        # Base case: if the coords are in the history set, return infinity
-        if coords in self.__history:
-            return float("inf")
+        Cell (row, col) is at index (row + 1) * width + col. The last column of every row is a wall, as are the rows before and after the grid, so a neighbor's index never needs a bounds check.
 
-        # Add the coords to the history set
-        self.__history.add(coords)
+        Returns
+        ----------
+        tuple
+            The cells as a bytearray (_WALL or _OPEN) and the padded row width.
+        """
 
-        # Recursive cases: try to move in all four directions
-        first = self.__shortest_path_helper((row - 1, col), memo)
-        second = self.__shortest_path_helper((row + 1, col), memo)
-        third = self.__shortest_path_helper((row, col - 1), memo)
-        fourth = self.__shortest_path_helper((row, col + 1), memo)
+        # Unpacked a slice at a time straight into the copy, so the binary
+        # digits on the way are never more than a few pages long
+        packed = self.__cells
+        cells = bytearray(8 * len(packed))
+        for start in range(0, len(packed), _UNPACK_BYTES):
+            chunk = packed[start:start + _UNPACK_BYTES]
+            digits = f"{int.from_bytes(chunk, 'big'):0{8 * len(chunk)}b}".encode()
+            cells[8 * start:8 * (start + len(chunk))] = digits.translate(_DIGIT_CELLS)
+        return cells, self.__width
+
+    def __is_open(self, loc: tuple) -> bool:
+        index = (loc[0] + 1) * self.__width + loc[1]
+        return self.__cells[index >> 3] >> (7 - (index & 7)) & 1 == 1
+
+    @staticmethod
+    def __flat_text(grid: list) -> tuple:
+        """
+        The grid as one byte string with a wall all around it, one byte per cell.
 
-        # Find the shortest path
-        shortest = min(first, second, third, fourth) + 1
+        Returns
+        ----------
+        tuple
+            The bytes and the padded row width.
+        """
 
-        # Add the shortest path to the memoization dictionary
-        memo[coords] = shortest
+        width = len(grid[0]) + 1
+        rows = []
+        for row in grid:
+            if len(row) != width - 1:
+                raise ValueError("Grid rows must all be the same length.")
+            text = "".join(row)
+            # the right total length is not enough: an empty cell and a
+            # two-character cell add up to two cells
+            if len(text) != width - 1 or max(map(len, row)) != 1 or not text.isascii():
+                # cells that are not one ASCII character: map them one at a time
+                text = "".join(cell if len(cell) == 1 and cell.isascii() else "o" for cell in row)
+            rows.append(text)
+        text = "x" * width + "x".join(rows) + "x" * (width + 1)
+        return text.encode(), width
+
+    @staticmethod
+    def __index(loc: tuple, width: int) -> int:
+        return (loc[0] + 1) * width + loc[1]
+
+    @staticmethod
+    def __trace_path(cells, goal: int, width: int) -> LLStack:
+        """
+        Follow the recorded steps back from goal and build the path.
 
-        # Remove the coords from the history set
-        return shortest
+        Parameters
+        ----------
+        cells : bytearray or dict
+            Step that reached each cell by flat index: a whole grid copy, or a dict of just the reached cells.
+        goal : int
+            Flat index to trace back from.
+        width : int
+            Padded row width.
 
-    def __make_shortest_path(self, coords, length, memo):
-        row, col = coords
-        # Check upward movement
-        if self.__path_helper(row - 1, col, length, memo):
-            return True
-        # Check downward movement
-        elif self.__path_helper(row + 1, col, length, memo):
-            return True
-        # Check leftward movement
-        elif self.__path_helper(row, col - 1, length, memo):
-            return True
-        # Check rightward movement
-        elif self.__path_helper(row, col + 1, length, memo):
-            return True
-        # If none of the directions work, return False
-        return False
+        Returns
+        ----------
+        LLStack
+            Path with goal at the top of the stack and the start cell at the bottom.
+        """
 
-    def __path_helper(self, next_row, next_col, length, memo):
-        if (next_row, next_col) in memo and memo[(next_row, next_col)] == length - 1:
-            self.__shortest_path.push((next_row, next_col))
-            self.__make_shortest_path((next_row, next_col), length - 1, memo)
-            return True
-        return False
\ No newline at end of file
+        back = {_UP: width, _DOWN: -width, _LEFT: 1, _RIGHT: -1}
+        indices = [goal]
+        while cells[indices[-1]] != _START:
+            indices.append(indices[-1] + back[cells[indices[-1]]])
+        path = LLStack()
+        for index in reversed(indices):
+            path.push((index // width - 1, index % width))
+        return path
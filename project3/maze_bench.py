@@ -0,0 +1,60 @@
+import argparse
+import random
+import time
+from maze import Maze
+
+METHODS = ("bfs", "bidirectional", "astar")
+
+
+def random_maze(size: int, density: float, rng: random.Random) -> Maze:
+    """A size x size grid with each cell a wall with probability density, between two random open cells."""
+    grid = [["x" if rng.random() < density else "o" for _ in range(size)] for _ in range(size)]
+    entry = (rng.randrange(size), rng.randrange(size))
+    exit = (rng.randrange(size), rng.randrange(size))
+    grid[entry[0]][entry[1]] = "o"
+    grid[exit[0]][exit[1]] = "o"
+    return Maze(grid, entry, exit)
+
+
+def bench_density(size: int, density: float, trials: int, seed: int = 0) -> dict:
+    """Mean cells expanded and seconds per solve for each method, over the same mazes."""
+    rng = random.Random(seed)
+    expanded = dict.fromkeys(METHODS, 0)
+    seconds = dict.fromkeys(METHODS, 0.0)
+    solved = 0
+    for _ in range(trials):
+        maze = random_maze(size, density, rng)
+        for method in METHODS:
+            start = time.perf_counter()
+            maze.solve_shortest(method)
+            seconds[method] += time.perf_counter() - start
+            expanded[method] += maze.nodes_expanded
+        solved += maze.shortest_path is not None
+    return {
+        "solved": solved / trials,
+        "expanded": {method: expanded[method] / trials for method in METHODS},
+        "seconds": {method: seconds[method] / trials for method in METHODS},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cells expanded by the Maze.solve_shortest methods")
+    parser.add_argument("--size", type=int, default=300)
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--densities", type=float, nargs="+", default=[0.0, 0.1, 0.2, 0.3, 0.4])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.size}x{args.size} grids, {args.trials} random entry/exit pairs per density")
+    print("mean cells expanded (ms per solve)")
+    print("  density solved " + " ".join(f"{method:>21}" for method in METHODS))
+    for density in args.densities:
+        result = bench_density(args.size, density, args.trials, args.seed)
+        columns = " ".join(
+            f"{result['expanded'][method]:11.0f} ({result['seconds'][method] * 1e3:6.1f})" for method in METHODS
+        )
+        print(f"  {density:7.2f} {result['solved']:6.0%} {columns}")
+
+
+if __name__ == "__main__":
+    main()
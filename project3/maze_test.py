@@ -68,6 +68,57 @@ class TestMaze(unittest.TestCase):
         with self.assertRaises(ValueError):
             Maze(grid, entry, exit)
 
+    def test_init_invalid_cells(self):
+        grid = [
+            ["o", "x", "o"],
+            ["o", 1, "o"],
+            ["o", "o", "o"],
+        ]
+        with self.assertRaises(TypeError):
+            Maze(grid, (0, 0), (2, 2))
+
+    def test_init_ragged_grid(self):
+        grid = [
+            ["o", "x", "o"],
+            ["o", "x"],
+            ["o", "o", "o"],
+        ]
+        with self.assertRaises(ValueError):
+            Maze(grid, (0, 0), (2, 2))
+
+    def test_init_copies_grid(self):
+        # the maze keeps its own compact copy of the grid
+        grid = [
+            ["o", "x", "o"],
+            ["o", "x", "o"],
+            ["o", "o", "o"],
+        ]
+        maze = Maze(grid, (0, 0), (0, 2))
+        grid[2][1] = "x"
+        for method in ("recursive", "iterative"):
+            maze.solve(method)
+            self.assertEqual(maze.path.size, 7)
+        maze.exit_coords = (2, 1)
+        with self.assertRaises(InvalidCoordinateError):
+            maze.entry_coords = (0, 1)
+
+    def test_init_cells_of_other_lengths(self):
+        # only "x" is a wall; an empty cell before a longer one must not
+        # shift the cells after it
+        grid = [
+            ["o", "", "xo"],
+            ["o", "x", "o"],
+            ["o", "o", "o"],
+        ]
+        maze = Maze(grid, (0, 0), (0, 1))
+        maze.solve_shortest()
+        self.assertEqual(maze.shortest_path.size, 2)
+        maze.solve("iterative")
+        self.assertEqual(maze.path.pop(), (0, 1))
+        maze.exit_coords = (0, 2)
+        maze.solve_shortest()
+        self.assertEqual(maze.shortest_path.size, 3)
+
     def test_init_invalid_entry(self):
         grid = [
             ["o", "x", "o"],
@@ -261,6 +312,67 @@ class TestMaze(unittest.TestCase):
         maze.solve()
         self.assertEqual(maze.path, None)
 
+    def test_solve_iterative(self):
+        grid = [
+            ["o", "x", "o"],
+            ["o", "x", "o"],
+            ["o", "o", "o"],
+        ]
+        entry = (0, 0)
+        exit = (2, 2)
+        maze = Maze(grid, entry, exit)
+        maze.solve("iterative")
+        self.assertEqual(maze.path.size, 5)
+        self.assertEqual(maze.path.pop(), (2, 2))
+        self.assertEqual(maze.path.pop(), (2, 1))
+        self.assertEqual(maze.path.pop(), (2, 0))
+        self.assertEqual(maze.path.pop(), (1, 0))
+        self.assertEqual(maze.path.pop(), (0, 0))
+
+    def test_solve_iterative_no_solution(self):
+        grid = [
+            ["o", "x", "o"],
+            ["o", "x", "o"],
+            ["o", "x", "o"],
+        ]
+        maze = Maze(grid, (0, 0), (2, 2))
+        maze.solve("iterative")
+        self.assertEqual(maze.path, None)
+
+    def test_solve_iterative_long_corridor(self):
+        # a single winding corridor far longer than the recursion limit
+        size = 301
+        grid = [["o"] * size for _ in range(size)]
+        for row in range(1, size, 2):
+            for col in range(size):
+                grid[row][col] = "x"
+            grid[row][size - 1 if row % 4 == 1 else 0] = "o"
+        maze = Maze(grid, (0, 0), (size - 1, size - 1))
+        maze.solve("iterative")
+        self.assertEqual(maze.path.size, (size + 1) // 2 * size + (size - 1) // 2)
+        self.assertEqual(maze.path.pop(), (size - 1, size - 1))
+
+    def test_solve_twice(self):
+        grid = [
+            ["o", "x", "o"],
+            ["o", "x", "o"],
+            ["o", "o", "o"],
+        ]
+        maze = Maze(grid, (0, 0), (2, 2))
+        for method in ("recursive", "iterative", "recursive"):
+            maze.solve(method)
+            self.assertEqual(maze.path.size, 5)
+
+    def test_solve_invalid_method(self):
+        grid = [
+            ["o", "x", "o"],
+            ["o", "x", "o"],
+            ["o", "o", "o"],
+        ]
+        maze = Maze(grid, (0, 0), (2, 2))
+        with self.assertRaises(ValueError):
+            maze.solve("sideways")
+
     def test_solve_shortest(self):
         grid = [
             ["o", "x", "o"],
@@ -288,6 +400,209 @@ class TestMaze(unittest.TestCase):
         maze.solve_shortest()
         self.assertEqual(maze.shortest_path, None)
 
+    def test_solve_shortest_takes_shorter_route(self):
+        grid = [
+            ["o", "o", "o", "o", "o"],
+            ["o", "x", "x", "x", "o"],
+            ["o", "o", "o", "x", "o"],
+            ["x", "x", "o", "x", "o"],
+            ["o", "o", "o", "o", "o"],
+        ]
+        entry = (0, 0)
+        exit = (4, 4)
+        maze = Maze(grid, entry, exit)
+        maze.solve_shortest()
+        self.assertEqual(maze.shortest_path.size, 9)
+        self.assertEqual(maze.shortest_path.pop(), (4, 4))
+        previous = (4, 4)
+        while maze.shortest_path.size > 0:
+            current = maze.shortest_path.pop()
+            self.assertEqual(abs(current[0] - previous[0]) + abs(current[1] - previous[1]), 1)
+            self.assertNotEqual(grid[current[0]][current[1]], "x")
+            previous = current
+        self.assertEqual(previous, (0, 0))
+
+    def test_solve_shortest_long_corridor(self):
+        # a single winding corridor far longer than the recursion limit
+        size = 301
+        grid = [["o"] * size for _ in range(size)]
+        for row in range(1, size, 2):
+            for col in range(size):
+                grid[row][col] = "x"
+            grid[row][size - 1 if row % 4 == 1 else 0] = "o"
+        maze = Maze(grid, (0, 0), (size - 1, size - 1))
+        maze.solve_shortest()
+        self.assertEqual(maze.shortest_path.size, (size + 1) // 2 * size + (size - 1) // 2)
+        self.assertEqual(maze.shortest_path.pop(), (size - 1, size - 1))
+
+    def test_solve_shortest_entry_is_exit(self):
+        grid = [
+            ["o", "x", "o"],
+            ["o", "x", "o"],
+            ["o", "o", "o"],
+        ]
+        maze = Maze(grid, (1, 0), (1, 0))
+        maze.solve_shortest()
+        self.assertEqual(maze.shortest_path.size, 1)
+        self.assertEqual(maze.shortest_path.pop(), (1, 0))
+
+
+    def test_solve_shortest_bidirectional(self):
+        grid = [
+            ["o", "o", "o", "o", "o"],
+            ["o", "x", "x", "x", "o"],
+            ["o", "o", "o", "x", "o"],
+            ["x", "x", "o", "x", "o"],
+            ["o", "o", "o", "o", "o"],
+        ]
+        maze = Maze(grid, (0, 0), (4, 4))
+        maze.solve_shortest("bidirectional")
+        self.assertEqual(maze.shortest_path.size, 9)
+        self.assertEqual(maze.shortest_path.pop(), (4, 4))
+        previous = (4, 4)
+        while maze.shortest_path.size > 0:
+            current = maze.shortest_path.pop()
+            self.assertEqual(abs(current[0] - previous[0]) + abs(current[1] - previous[1]), 1)
+            self.assertNotEqual(grid[current[0]][current[1]], "x")
+            previous = current
+        self.assertEqual(previous, (0, 0))
+
+    def test_solve_shortest_bidirectional_expands_less(self):
+        # on an open grid each side covers a diamond half as wide as the
+        # one breadth-first search covers from the entry alone
+        size = 101
+        grid = [["o"] * size for _ in range(size)]
+        maze = Maze(grid, (50, 30), (50, 70))
+        maze.solve_shortest()
+        bfs_expanded = maze.nodes_expanded
+        maze.solve_shortest("bidirectional")
+        self.assertEqual(maze.shortest_path.size, 41)
+        self.assertLess(maze.nodes_expanded, bfs_expanded * 3 // 4)
+
+    def test_solve_shortest_bidirectional_no_solution(self):
+        grid = [
+            ["o", "x", "o"],
+            ["o", "x", "o"],
+            ["o", "x", "o"],
+        ]
+        maze = Maze(grid, (0, 0), (2, 2))
+        maze.solve_shortest("bidirectional")
+        self.assertEqual(maze.shortest_path, None)
+
+    def test_solve_shortest_bidirectional_long_corridor(self):
+        size = 301
+        grid = [["o"] * size for _ in range(size)]
+        for row in range(1, size, 2):
+            for col in range(size):
+                grid[row][col] = "x"
+            grid[row][size - 1 if row % 4 == 1 else 0] = "o"
+        maze = Maze(grid, (0, 0), (size - 1, size - 1))
+        maze.solve_shortest("bidirectional")
+        self.assertEqual(maze.shortest_path.size, (size + 1) // 2 * size + (size - 1) // 2)
+        self.assertEqual(maze.shortest_path.pop(), (size - 1, size - 1))
+
+    def test_solve_shortest_bidirectional_entry_is_exit(self):
+        grid = [
+            ["o", "x", "o"],
+            ["o", "x", "o"],
+            ["o", "o", "o"],
+        ]
+        maze = Maze(grid, (1, 0), (1, 0))
+        maze.solve_shortest("bidirectional")
+        self.assertEqual(maze.shortest_path.size, 1)
+        self.assertEqual(maze.shortest_path.pop(), (1, 0))
+
+    def test_solve_shortest_astar(self):
+        grid = [
+            ["o", "o", "o", "o", "o"],
+            ["o", "x", "x", "x", "o"],
+            ["o", "o", "o", "x", "o"],
+            ["x", "x", "o", "x", "o"],
+            ["o", "o", "o", "o", "o"],
+        ]
+        maze = Maze(grid, (0, 0), (4, 4))
+        maze.solve_shortest()
+        bfs_expanded = maze.nodes_expanded
+        maze.solve_shortest("astar")
+        self.assertEqual(maze.shortest_path.size, 9)
+        self.assertEqual(maze.shortest_path.pop(), (4, 4))
+        self.assertLessEqual(maze.nodes_expanded, bfs_expanded)
+
+    def test_solve_shortest_astar_open_grid(self):
+        size = 50
+        grid = [["o"] * size for _ in range(size)]
+        maze = Maze(grid, (0, 0), (size - 1, size - 1))
+        maze.solve_shortest()
+        self.assertEqual(maze.nodes_expanded, size * size - 1)
+        maze.solve_shortest("astar")
+        self.assertEqual(maze.shortest_path.size, 2 * size - 1)
+        self.assertEqual(maze.nodes_expanded, 2 * size - 1)
+
+    def test_solve_shortest_astar_digit_costs(self):
+        # the direct route along the top row is shorter but costs more
+        grid = [
+            ["o", "9", "9", "o"],
+            ["o", "x", "x", "o"],
+            ["o", "1", "1", "o"],
+        ]
+        maze = Maze(grid, (0, 0), (0, 3))
+        maze.solve_shortest()
+        self.assertEqual(maze.shortest_path.size, 4)
+        maze.solve_shortest("astar")
+        self.assertEqual(maze.shortest_path.size, 8)
+        self.assertEqual(maze.shortest_path.pop(), (0, 3))
+
+    def test_solve_shortest_astar_cost_matrix(self):
+        grid = [
+            ["o", "o", "o", "o"],
+            ["o", "x", "x", "o"],
+            ["o", "o", "o", "o"],
+        ]
+        costs = [
+            [1, 50, 50, 1],
+            [1, 1, 1, 1],
+            [1, 1, 1, 1],
+        ]
+        maze = Maze(grid, (0, 0), (0, 3), costs)
+        maze.solve_shortest("astar")
+        self.assertEqual(maze.shortest_path.size, 8)
+        maze.solve_shortest()
+        self.assertEqual(maze.shortest_path.size, 4)
+
+    def test_solve_shortest_astar_no_solution(self):
+        grid = [
+            ["o", "x", "o"],
+            ["o", "x", "o"],
+            ["o", "x", "o"],
+        ]
+        maze = Maze(grid, (0, 0), (2, 2))
+        maze.solve_shortest("astar")
+        self.assertEqual(maze.shortest_path, None)
+
+    def test_init_invalid_costs(self):
+        grid = [
+            ["o", "x", "o"],
+            ["o", "x", "o"],
+            ["o", "o", "o"],
+        ]
+        with self.assertRaises(TypeError):
+            Maze(grid, (0, 0), (2, 2), "costs")
+        with self.assertRaises(ValueError):
+            Maze(grid, (0, 0), (2, 2), [[1, 1, 1], [1, 1, 1]])
+        with self.assertRaises(TypeError):
+            Maze(grid, (0, 0), (2, 2), [[1, 1, 1], [1, 1.5, 1], [1, 1, 1]])
+        with self.assertRaises(ValueError):
+            Maze(grid, (0, 0), (2, 2), [[1, 1, 1], [1, 0, 1], [1, 1, 1]])
+
+    def test_solve_shortest_invalid_method(self):
+        grid = [
+            ["o", "x", "o"],
+            ["o", "x", "o"],
+            ["o", "o", "o"],
+        ]
+        maze = Maze(grid, (0, 0), (2, 2))
+        with self.assertRaises(ValueError):
+            maze.solve_shortest("dfs")
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,473 @@
+import argparse
+from array import array
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import NamedTuple
+from chess_model import ChessModel
+from player import Player
+from bitboard import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, WHITE, BLACK
+from move_gen import KNIGHT_TARGETS, KING_TARGETS, ROOK_RAYS, BISHOP_RAYS, QUEEN_RAYS, new_move_list
+from chess_search import code_to_move
+from fen import STANDARD_FEN, load_fen
+
+# Endgame tables for pawnless material such as KQK, KRK or KQKR.
+#
+# A material name lists white's pieces then black's, each starting with its
+# king, strongest piece first. A table covers both sides to move. Each entry
+# holds the result for the side to move (1 win, 0 draw, -1 loss) and the
+# distance to mate in plies.
+#
+# Without pawns the board can be turned and mirrored freely, so the white
+# king is always mapped into the a1-d1-d4 triangle (10 squares):
+#   index = ((side * 10 + king slot) * 64 + square 2) * 64 + ...
+# File layout, little-endian: header, then entries x i8 results, then
+# entries x u16 distances.
+MAX_PIECES = 4
+MAGIC = b"CHESSTB1"
+HEADER = struct.Struct("<8s8sQ")
+LETTERS = "KQRBN"
+LETTER_TYPES = {"K": KING, "Q": QUEEN, "R": ROOK, "B": BISHOP, "N": KNIGHT}
+TYPE_LETTERS = {piece_type: letter for letter, piece_type in LETTER_TYPES.items()}
+# counts value marking an index that is not a reachable position
+ILLEGAL = 255
+
+
+class TableResult(NamedTuple):
+    # 1 the side to move wins, 0 draw, -1 the side to move loses
+    wdl: int
+    # plies to mate with best play; 0 when checkmated or drawn
+    dtm: int
+
+
+DRAW = TableResult(0, 0)
+
+
+def _transform(square: int, flip_rows: bool, flip_cols: bool, swap: bool) -> int:
+    row, col = divmod(square, 8)
+    if swap:
+        row, col = col, row
+    if flip_rows:
+        row = 7 - row
+    if flip_cols:
+        col = 7 - col
+    return row * 8 + col
+
+
+# The eight symmetries of the board, identity first
+TRANSFORMS = tuple(
+    tuple(_transform(square, flip_rows, flip_cols, swap) for square in range(64))
+    for swap in (False, True) for flip_rows in (False, True) for flip_cols in (False, True)
+)
+# a1-d1-d4: files a-d, rank at most the file
+KING_SQUARES = tuple(row * 8 + col for row in range(7, 3, -1) for col in range(4) if 7 - row <= col)
+KING_SLOTS = {square: slot for slot, square in enumerate(KING_SQUARES)}
+KING_TRANSFORM = tuple(
+    next(number for number, transform in enumerate(TRANSFORMS) if transform[square] in KING_SLOTS)
+    for square in range(64)
+)
+# Reflection in the a1-h8 diagonal, which leaves a king on a1, b2, c3 or d4
+# in the triangle
+REFLECT = tuple((7 - square % 8) * 8 + (7 - square // 8) for square in range(64))
+ON_DIAGONAL = tuple(REFLECT[square] == square for square in range(64))
+
+
+def split_material(material: str) -> tuple:
+    """("KQ", "K") for "KQK"; raises ValueError for anything but kings and pieces."""
+    material = material.upper()
+    second = material.find("K", 1)
+    if not material.startswith("K") or second < 0 or material.count("K") != 2:
+        raise ValueError(f"Material needs one king per side: {material!r}")
+    if any(letter not in LETTERS for letter in material):
+        raise ValueError(f"Tables cover kings, queens, rooks, bishops and knights only: {material!r}")
+    if len(material) > MAX_PIECES:
+        raise ValueError(f"Tables cover at most {MAX_PIECES} pieces: {material!r}")
+    order = LETTERS.index
+    return "".join(sorted(material[:second], key=order)), "".join(sorted(material[second:], key=order))
+
+
+def canonical_material(material: str) -> str:
+    """The name a material's table is stored under: the side with more (or stronger) pieces as white."""
+    white, black = split_material(material)
+
+    def strength(side: str) -> tuple:
+        return -len(side), tuple(LETTERS.index(letter) for letter in side)
+
+    if strength(black) < strength(white):
+        white, black = black, white
+    return white + black
+
+
+def _material_name(types) -> str:
+    return "".join(TYPE_LETTERS[piece_type] for piece_type in types)
+
+
+def _index(squares, side: int) -> int:
+    # squares[0] is always the white king
+    transform = TRANSFORMS[KING_TRANSFORM[squares[0]]]
+    king = transform[squares[0]]
+    index = side * 10 + KING_SLOTS[king]
+    for square in squares[1:]:
+        index = index * 64 + transform[square]
+    if ON_DIAGONAL[king]:
+        # a king on the diagonal leaves two mirror images; take the smaller
+        reflected = side * 10 + KING_SLOTS[king]
+        for square in squares[1:]:
+            reflected = reflected * 64 + REFLECT[transform[square]]
+        index = min(index, reflected)
+    return index
+
+
+def _decode(index: int, count: int) -> tuple:
+    squares = [0] * count
+    for slot in range(count - 1, 0, -1):
+        index, squares[slot] = divmod(index, 64)
+    side, king_slot = divmod(index, 10)
+    squares[0] = KING_SQUARES[king_slot]
+    return side, squares
+
+
+def _attacks(piece_type: int, square: int, occupied: int) -> int:
+    if piece_type == KING:
+        return KING_TARGETS[square]
+    if piece_type == KNIGHT:
+        return KNIGHT_TARGETS[square]
+    if piece_type == QUEEN:
+        rays = QUEEN_RAYS[square]
+    elif piece_type == ROOK:
+        rays = ROOK_RAYS[square]
+    else:
+        rays = BISHOP_RAYS[square]
+    mask = 0
+    for ray in rays:
+        for to_square in ray:
+            mask |= 1 << to_square
+            if occupied >> to_square & 1:
+                break
+    return mask
+
+
+def _attacked(square: int, color: int, colors, types, squares, occupied: int, skip: int = -1) -> bool:
+    for slot, piece_color in enumerate(colors):
+        if piece_color == color and slot != skip and _attacks(types[slot], squares[slot], occupied) >> square & 1:
+            return True
+    return False
+
+
+def _legal_moves(colors, types, squares, side: int, king: int, occupied: int):
+    # (slot, to square, captured slot or -1) for every legal move of side
+    own = 0
+    for slot, piece_color in enumerate(colors):
+        if piece_color == side:
+            own |= 1 << squares[slot]
+    for slot, piece_color in enumerate(colors):
+        if piece_color != side:
+            continue
+        from_square = squares[slot]
+        targets = _attacks(types[slot], from_square, occupied) & ~own
+        while targets:
+            low = targets & -targets
+            targets ^= low
+            to_square = low.bit_length() - 1
+            captured = squares.index(to_square) if occupied & low else -1
+            after = occupied & ~(1 << from_square) | low
+            moved = list(squares)
+            moved[slot] = to_square
+            king_square = to_square if slot == king else squares[king]
+            if not _attacked(king_square, side ^ 1, colors, types, moved, after, captured):
+                yield slot, to_square, captured
+
+
+class Tablebase:
+    """Endgame tables in a directory, memory-mapped as they are first needed."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.__tables = {}
+
+    def path(self, material: str) -> str:
+        return os.path.join(self.directory, canonical_material(material) + ".tb")
+
+    def __table(self, name: str):
+        if name not in self.__tables:
+            path = os.path.join(self.directory, name + ".tb")
+            table = None
+            if os.path.exists(path):
+                file = open(path, "rb")
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, material, count = HEADER.unpack_from(mapped)
+                if magic != MAGIC or material.rstrip(b"\0").decode() != name:
+                    mapped.close()
+                    file.close()
+                    raise ValueError(f"{path} is not the {name} table")
+                view = memoryview(mapped)
+                start = HEADER.size
+                table = (file, mapped, view, view[start:start + count].cast("b"),
+                         view[start + count:start + 3 * count].cast("H"))
+            # a missing table is remembered too, until refresh
+            self.__tables[name] = table
+        return self.__tables[name]
+
+    def refresh(self):
+        """Forget tables that were missing so newly generated files are found."""
+        self.__tables = {name: table for name, table in self.__tables.items() if table is not None}
+
+    def lookup(self, colors, types, squares, side: int) -> TableResult:
+        """Result for pieces listed white first, king first, strongest next; None without a table."""
+        if len(squares) == 2:
+            return DRAW
+        table = self.__table(_material_name(types))
+        if table is None:
+            # the same ending with the colors exchanged and the board flipped
+            order = [slot for slot in range(len(colors)) if colors[slot] == BLACK]
+            order += [slot for slot in range(len(colors)) if colors[slot] == WHITE]
+            types = [types[slot] for slot in order]
+            squares = [squares[slot] ^ 56 for slot in order]
+            side ^= 1
+            table = self.__table(_material_name(types))
+            if table is None:
+                return None
+        index = _index(squares, side)
+        return TableResult(table[3][index], table[4][index])
+
+    def probe(self, model: ChessModel) -> TableResult:
+        """Result for the side to move, or None when no table covers the position."""
+        board = model.bitboards
+        pieces = board.pieces
+        if bin(board.occupied).count("1") > MAX_PIECES or pieces[PAWN] or pieces[6 + PAWN]:
+            return None
+        colors, types, squares = [], [], []
+        for color in (WHITE, BLACK):
+            for piece_type in (KING, QUEEN, ROOK, BISHOP, KNIGHT):
+                bb = pieces[color * 6 + piece_type]
+                while bb:
+                    low = bb & -bb
+                    bb ^= low
+                    colors.append(color)
+                    types.append(piece_type)
+                    squares.append(low.bit_length() - 1)
+        if types.count(KING) != 2:
+            return None
+        side = WHITE if model.current_player == Player.WHITE else BLACK
+        return self.lookup(colors, types, squares, side)
+
+    def best_move(self, model: ChessModel):
+        """The move keeping the table result: fastest mate, a draw, or the longest defence."""
+        if self.probe(model) is None:
+            return None
+        moves = new_move_list()
+        best, best_code = None, 0
+        for i in range(model.generate_moves(moves)):
+            code = moves[i]
+            model.make_move(code >> 6, code & 63)
+            result = self.probe(model)
+            model.undo()
+            if result is None:
+                continue
+            # the opponent's result after the move, best for us first
+            if result.wdl < 0:
+                rank = (2, -result.dtm)
+            elif result.wdl == 0:
+                rank = (1, 0)
+            else:
+                rank = (0, result.dtm)
+            if best is None or rank > best:
+                best, best_code = rank, code
+        return code_to_move(best_code) if best is not None else None
+
+    def close(self):
+        for table in self.__tables.values():
+            if table is not None:
+                file, mapped, view, wdl, dtm = table
+                wdl.release()
+                dtm.release()
+                view.release()
+                mapped.close()
+                file.close()
+        self.__tables = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def generate(material: str, directory: str, tablebase: Tablebase = None, progress=None) -> str:
+    """Build the table for material, and any smaller tables it captures into.
+
+    Retrograde analysis: mates are found first, then every position one ply
+    before a known loss is a win, and a position whose moves all reach known
+    wins is a loss. Positions are taken in order of distance to mate from one
+    bucket per ply, so each is handled once. Returns the table's path.
+    """
+    name = canonical_material(material)
+    white, black = split_material(name)
+    colors = tuple([WHITE] * len(white) + [BLACK] * len(black))
+    types = tuple(LETTER_TYPES[letter] for letter in white + black)
+    kings = (0, len(white))
+    count = len(types)
+    if tablebase is None:
+        tablebase = Tablebase(directory)
+
+    # captures lead into smaller tables, which have to exist first
+    for slot in range(count):
+        if types[slot] != KING:
+            smaller = white + black
+            smaller = smaller[:slot] + smaller[slot + 1:]
+            if len(smaller) > 2 and not os.path.exists(tablebase.path(smaller)):
+                generate(smaller, directory, tablebase, progress)
+    tablebase.refresh()
+
+    start = time.perf_counter()
+    size = 20 * 64 ** (count - 1)
+    wdl = array("b", bytes(size))
+    dtm = array("H", bytes(2 * size))
+    # moves not yet known to lose; ILLEGAL for unused indexes
+    counts = bytearray(size)
+    # longest loss through a capture, for positions that have one
+    loss_max = {}
+    buckets = []
+
+    def schedule(index: int, value: int, distance: int):
+        wdl[index] = value
+        dtm[index] = distance
+        while len(buckets) <= distance:
+            buckets.append(array("I"))
+        buckets[distance].append(index)
+
+    for index in range(size):
+        side, squares = _decode(index, count)
+        if len(set(squares)) < count or _index(squares, side) != index:
+            counts[index] = ILLEGAL
+            continue
+        occupied = 0
+        for square in squares:
+            occupied |= 1 << square
+        if _attacked(squares[kings[side ^ 1]], side, colors, types, squares, occupied):
+            counts[index] = ILLEGAL
+            continue
+
+        children = set()
+        moves, escapes, win, worst = 0, 0, None, 0
+        for slot, to_square, captured in _legal_moves(colors, types, squares, side, kings[side], occupied):
+            moves += 1
+            moved = list(squares)
+            moved[slot] = to_square
+            if captured < 0:
+                children.add(_index(moved, side ^ 1))
+                continue
+            del moved[captured]
+            result = tablebase.lookup(colors[:captured] + colors[captured + 1:],
+                                      types[:captured] + types[captured + 1:], moved, side ^ 1)
+            if result.wdl < 0:
+                win = result.dtm + 1 if win is None else min(win, result.dtm + 1)
+            elif result.wdl == 0:
+                escapes += 1
+            else:
+                worst = max(worst, result.dtm + 1)
+
+        if moves == 0:
+            if _attacked(squares[kings[side]], side ^ 1, colors, types, squares, occupied):
+                schedule(index, -1, 0)
+            continue
+        # children are counted once per distinct table entry, the same way
+        # the retrograde pass below reaches them
+        counts[index] = min(len(children) + escapes, ILLEGAL - 1)
+        if win is not None:
+            schedule(index, 1, win)
+        elif counts[index] == 0:
+            schedule(index, -1, worst)
+        elif worst:
+            loss_max[index] = worst
+
+    level = 0
+    while level < len(buckets):
+        for index in buckets[level]:
+            if dtm[index] != level:
+                # a win that was later found to be quicker
+                continue
+            side, squares = _decode(index, count)
+            value = wdl[index]
+            mover = side ^ 1
+            occupied = 0
+            for square in squares:
+                occupied |= 1 << square
+            predecessors = set()
+            for slot in range(count):
+                if colors[slot] != mover:
+                    continue
+                # pieces other than pawns move the same way backward
+                sources = _attacks(types[slot], squares[slot], occupied) & ~occupied
+                while sources:
+                    low = sources & -sources
+                    sources ^= low
+                    moved = list(squares)
+                    moved[slot] = low.bit_length() - 1
+                    predecessors.add(_index(moved, mover))
+            for previous in predecessors:
+                if counts[previous] == ILLEGAL:
+                    continue
+                if value < 0:
+                    if wdl[previous] == 0 or (wdl[previous] > 0 and dtm[previous] > level + 1):
+                        schedule(previous, 1, level + 1)
+                elif wdl[previous] == 0:
+                    counts[previous] -= 1
+                    if counts[previous] == 0:
+                        schedule(previous, -1, max(level + 1, loss_max.get(previous, 0)))
+        buckets[level] = None
+        level += 1
+
+    path = tablebase.path(name)
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, name.encode(), size))
+        wdl.tofile(file)
+        dtm.tofile(file)
+    tablebase.refresh()
+    if progress is not None:
+        progress(name, max(level - 1, 0), time.perf_counter() - start)
+    return path
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate or probe pawnless endgame tables")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("generate", help="build tables such as KQK KRK KQKR")
+    build.add_argument("directory")
+    build.add_argument("material", nargs="+")
+    probe = commands.add_parser("probe", help="look up a position")
+    probe.add_argument("directory")
+    probe.add_argument("--fen", default=STANDARD_FEN)
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        def report(name, longest, seconds):
+            print(f"{name:6} longest mate {longest:3} plies  {seconds:8.1f}s")
+
+        tablebase = Tablebase(args.directory)
+        for material in args.material:
+            if not os.path.exists(tablebase.path(material)):
+                generate(material, args.directory, tablebase, report)
+        tablebase.close()
+        return 0
+
+    model = ChessModel()
+    load_fen(model, args.fen)
+    with Tablebase(args.directory) as tablebase:
+        result = tablebase.probe(model)
+        if result is None:
+            print("no table for this position")
+            return 1
+        outcome = {1: "win", 0: "draw", -1: "loss"}[result.wdl]
+        print(f"{outcome} for the side to move, mate in {result.dtm} plies" if result.wdl else outcome)
+        move = tablebase.best_move(model)
+        if move is not None:
+            print(f"best move {move}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
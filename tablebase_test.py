@@ -0,0 +1,115 @@
+import os
+import random
+import tempfile
+import unittest
+from array import array
+from chess_model import ChessModel
+from fen import load_fen
+from player import Player
+from tablebase import HEADER, DRAW, TableResult, Tablebase, _decode, generate
+
+
+def placement_fen(pieces: dict, player: Player) -> str:
+    """FEN for a board holding only pieces, a dict from square (row * 8 + col) to letter."""
+    rows = []
+    for row in range(8):
+        text, empty = "", 0
+        for col in range(8):
+            letter = pieces.get(row * 8 + col)
+            if letter is None:
+                empty += 1
+                continue
+            text += (str(empty) if empty else "") + letter
+            empty = 0
+        rows.append(text + (str(empty) if empty else ""))
+    return "/".join(rows) + (" w" if player == Player.WHITE else " b") + " - - 0 1"
+
+
+def model_at(fen: str, tablebase: Tablebase = None) -> ChessModel:
+    model = ChessModel()
+    load_fen(model, fen)
+    model.tablebase = tablebase
+    return model
+
+
+class TestTablebase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.longest = {}
+        path = generate("KQK", cls.directory.name,
+                        progress=lambda name, longest, seconds: cls.longest.update({name: longest}))
+        with open(path, "rb") as file:
+            magic, material, count = HEADER.unpack(file.read(HEADER.size))
+            cls.wdl = array("b")
+            cls.wdl.fromfile(file, count)
+            cls.dtm = array("H")
+            cls.dtm.fromfile(file, count)
+        cls.tablebase = Tablebase(cls.directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tablebase.close()
+        cls.directory.cleanup()
+
+    def test_longest_mate(self):
+        # KQK takes at most 10 moves: 19 plies with white to move, 20 with black
+        self.assertEqual(self.longest["KQK"], 20)
+        index = self.dtm.index(20)
+        self.assertEqual(self.wdl[index], -1)
+        side, squares = _decode(index, 3)
+        fen = placement_fen(dict(zip(squares, "KQk")), Player.BLACK if side else Player.WHITE)
+        self.assertEqual(side, 1)
+        self.assertEqual(self.tablebase.probe(model_at(fen)), TableResult(-1, 20))
+
+    def test_best_move_shortens_mate(self):
+        model = model_at("8/8/8/3k4/8/8/8/Q3K3 w - - 0 1")
+        result = self.tablebase.probe(model)
+        self.assertEqual(result.wdl, 1)
+        while result.dtm:
+            model.move(self.tablebase.best_move(model))
+            following = self.tablebase.probe(model)
+            self.assertEqual((following.wdl, following.dtm), (-result.wdl, result.dtm - 1))
+            result = following
+        self.assertTrue(model.is_complete())
+
+    def test_checkmated(self):
+        model = model_at("k7/1Q6/1K6/8/8/8/8/8 b - - 0 1", self.tablebase)
+        self.assertEqual(self.tablebase.probe(model), TableResult(-1, 0))
+        self.assertTrue(model.is_complete())
+
+    def test_stalemate_is_draw(self):
+        model = model_at("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", self.tablebase)
+        self.assertEqual(self.tablebase.probe(model), DRAW)
+        self.assertFalse(model.is_complete())
+
+    def test_uncovered_position(self):
+        self.assertIsNone(self.tablebase.probe(ChessModel()))
+        self.assertIsNone(self.tablebase.probe(model_at("k7/8/1K6/8/8/8/8/7R w - - 0 1")))
+
+    def test_is_complete_matches_search(self):
+        rng = random.Random(3)
+        checked = 0
+        while checked < 300:
+            squares = rng.sample(range(64), 3)
+            player = rng.choice((Player.WHITE, Player.BLACK))
+            fen = placement_fen(dict(zip(squares, "KQk")), player)
+            searched = model_at(fen)
+            other = Player.BLACK if player == Player.WHITE else Player.WHITE
+            kings_touch = max(abs(squares[0] // 8 - squares[2] // 8), abs(squares[0] % 8 - squares[2] % 8)) <= 1
+            if kings_touch or searched.in_check(other):
+                continue
+            self.assertEqual(model_at(fen, self.tablebase).is_complete(), searched.is_complete(), fen)
+            checked += 1
+
+    def test_wrong_magic(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "KQK.tb"), "wb") as file:
+                file.write(HEADER.pack(b"NOTATB!!", b"KQK", 0))
+            with Tablebase(directory) as tablebase:
+                with self.assertRaises(ValueError):
+                    tablebase.probe(model_at("k7/8/1K6/8/8/8/8/7Q w - - 0 1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
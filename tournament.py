@@ -0,0 +1,189 @@
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+from array import array
+from typing import NamedTuple
+from chess_model import ChessModel, MoveValidity, GameOutcome
+from chess_search import SearchEngine, code_to_move
+from opening_book import OpeningBook
+from tablebase import Tablebase
+from player import Player
+
+
+class GameRecord(NamedTuple):
+    """One finished game, small enough to send back from a worker cheaply."""
+    game: int
+    # packed from/to codes (see move_gen), two bytes per ply
+    moves: bytes
+    # "1-0", "0-1", "1/2-1/2", or "*" when the ply limit stopped the game
+    result: str
+    # a GameOutcome as text, "ply limit", or "no move proposed"
+    reason: str
+    # how many proposed moves got each MoveValidity, in enum order; Invalid
+    # stays 0 while the pieces' rules and the model's move generator agree
+    validity: tuple
+
+    def move_list(self) -> list:
+        return [code_to_move(code) for code in array("H", self.moves)]
+
+
+class RandomPlayer:
+    """Proposes random piece moves until ChessModel.is_valid_move accepts one.
+
+    Candidates are the moves the pieces' own is_valid_move allows, not the
+    model's move generator, so the validity counts check the two against
+    each other: Invalid counts moves the pieces allow that the model rejects.
+    """
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def choose(self, model: ChessModel, counts: list) -> int:
+        board = model.board
+        squares = [row * 8 + col for row in range(8) for col in range(8)
+                   if board[row][col] is not None and board[row][col].player == model.current_player]
+        candidates = [square << 6 | target for square in squares for target in range(64)]
+        self.rng.shuffle(candidates)
+        for code in candidates:
+            move = code_to_move(code)
+            if not board[move.from_row][move.from_col].is_valid_move(move, board):
+                continue
+            valid = model.is_valid_move(move)
+            counts[model.messageCode.value - 1] += 1
+            if valid:
+                return code
+        return 0
+
+
+class EnginePlayer:
+    def __init__(self, depth: int, rng: random.Random, book: OpeningBook = None, tablebase: Tablebase = None):
+        # the game's rng picks the book moves, so a seed replays the same game
+        self.engine = SearchEngine(max_depth=depth, book=book, tablebase=tablebase, rng=rng)
+
+    def choose(self, model: ChessModel, counts: list) -> int:
+        move = self.engine.best_move(model)
+        if move is None:
+            return 0
+        model.is_valid_move(move)
+        counts[model.messageCode.value - 1] += 1
+        return (move.from_row * 8 + move.from_col) << 6 | (move.to_row * 8 + move.to_col)
+
+
+def make_player(kind: str, depth: int, rng: random.Random, book: OpeningBook = None,
+                tablebase: Tablebase = None):
+    if kind == "engine":
+        return EnginePlayer(depth, rng, book, tablebase)
+    return RandomPlayer(rng)
+
+
+def play_game(task: tuple) -> GameRecord:
+    """Play one game from a (game number, seed, settings) task.
+
+    Runs inside a worker process, so it builds its own ChessModel and players.
+    """
+    game, seed, settings = task
+    rng = random.Random(seed)
+    model = ChessModel(settings["backend"])
+    # every worker maps the same file, so the book's pages are shared
+    book = OpeningBook(settings["book"]) if settings["book"] else None
+    tablebase = Tablebase(settings["tablebase"]) if settings["tablebase"] else None
+    players = {
+        Player.WHITE: make_player(settings["white"], settings["depth"], rng, book, tablebase),
+        Player.BLACK: make_player(settings["black"], settings["depth"], rng, book, tablebase),
+    }
+    counts = [0] * len(MoveValidity)
+    codes = array("H")
+
+    outcome = model.outcome()
+    stopped = "ply limit"
+    while outcome is None and len(codes) < settings["max_plies"]:
+        code = players[model.current_player].choose(model, counts)
+        if code == 0:
+            # a8 to a8 is no move: the player found nothing the model accepts
+            stopped = "no move proposed"
+            break
+        model.make_move(code >> 6, code & 63)
+        codes.append(code)
+        outcome = model.outcome()
+
+    if outcome is None:
+        result, reason = "*", stopped
+    elif outcome == GameOutcome.Checkmate:
+        result = "0-1" if model.current_player == Player.WHITE else "1-0"
+        reason = str(outcome)
+    else:
+        result, reason = "1/2-1/2", str(outcome)
+
+    if book is not None:
+        book.close()
+    if tablebase is not None:
+        tablebase.close()
+    return GameRecord(game, codes.tobytes(), result, reason, tuple(counts))
+
+
+def run_tournament(games: int, workers: int = None, seed: int = 0, **settings):
+    """Yield GameRecords as workers finish them, in completion order."""
+    settings.setdefault("backend", "list")
+    settings.setdefault("white", "random")
+    settings.setdefault("black", "random")
+    settings.setdefault("depth", 2)
+    settings.setdefault("max_plies", 200)
+    settings.setdefault("book", None)
+    settings.setdefault("tablebase", None)
+    tasks = [(game, seed * 1000003 + game, settings) for game in range(games)]
+    workers = workers or multiprocessing.cpu_count()
+    if workers == 1:
+        yield from map(play_game, tasks)
+        return
+    # a few games per chunk keeps the pool busy without holding results back
+    chunksize = max(1, games // (workers * 8))
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(play_game, tasks, chunksize)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Self-play tournament for ChessModel")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None, help="defaults to one per core")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--white", choices=("random", "engine"), default="random")
+    parser.add_argument("--black", choices=("random", "engine"), default="random")
+    parser.add_argument("--depth", type=int, default=2, help="engine search depth")
+    parser.add_argument("--max-plies", type=int, default=200)
+    parser.add_argument("--backend", choices=("list", "bitboard"), default="list")
+    parser.add_argument("--book", help="opening book file for engine players (see opening_book.py)")
+    parser.add_argument("--tablebase", help="endgame table directory for engine players (see tablebase.py)")
+    parser.add_argument("--output", help="write one JSON record per game to this file")
+    args = parser.parse_args()
+
+    output = open(args.output, "w") if args.output else None
+    results = {}
+    start = time.perf_counter()
+    for record in run_tournament(args.games, args.workers, args.seed, backend=args.backend,
+                                 white=args.white, black=args.black, depth=args.depth,
+                                 max_plies=args.max_plies, book=args.book,
+                                 tablebase=args.tablebase):
+        results[record.result] = results.get(record.result, 0) + 1
+        if output:
+            output.write(json.dumps({
+                "game": record.game,
+                "moves": record.moves.hex(),
+                "result": record.result,
+                "reason": record.reason,
+                "validity": dict(zip((v.name for v in MoveValidity), record.validity)),
+            }) + "\n")
+    seconds = time.perf_counter() - start
+    if output:
+        output.close()
+
+    print(f"{args.games} games in {seconds:.2f}s ({args.games / seconds:.1f} games/s)")
+    for result, count in sorted(results.items()):
+        print(f"  {result:8} {count}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+import unittest
+from unittest import mock
+from chess_model import ChessModel, MoveValidity
+from tournament import RandomPlayer, play_game, run_tournament
+
+SETTINGS = {"backend": "list", "white": "random", "black": "random", "depth": 1, "max_plies": 40,
+            "book": None, "tablebase": None}
+
+
+class TestTournament(unittest.TestCase):
+    def test_records_replay(self):
+        for record in run_tournament(3, 1, 5, max_plies=40):
+            model = ChessModel()
+            for move in record.move_list():
+                self.assertTrue(model.is_valid_move(move))
+                model.move(move)
+            self.assertEqual(len(record.move_list()), 40)
+            self.assertEqual(record.reason, "ply limit")
+            self.assertEqual(record.validity[MoveValidity.Valid.value - 1], 40)
+
+    def test_same_seed_same_game(self):
+        first = play_game((0, 11, SETTINGS))
+        second = play_game((0, 11, SETTINGS))
+        self.assertEqual(first.moves, second.moves)
+
+    def test_no_move_proposed_stops_game(self):
+        # code 0 (a8 to a8) must end the game, not reach make_move
+        with mock.patch.object(RandomPlayer, "choose", return_value=0):
+            record = play_game((0, 1, SETTINGS))
+        self.assertEqual(record.moves, b"")
+        self.assertEqual((record.result, record.reason), ("*", "no move proposed"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+# Bound types for stored scores
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# key (8) + score (4) + move (2) + depth (1) + bound (1)
+ENTRY_BYTES = 16
+
+
+def table_bytes(megabytes: float) -> int:
+    """Bytes the table uses for a given budget (a power-of-two entry count)."""
+    if megabytes <= 0:
+        raise ValueError("Table size must be positive.")
+    # Two entries per bucket; round the bucket count down to a power of two
+    # so a mask picks the bucket
+    buckets = 1
+    while buckets * 4 * ENTRY_BYTES <= megabytes * (1 << 20):
+        buckets *= 2
+    return buckets * 2 * ENTRY_BYTES
+
+
+class TranspositionTable:
+    """Fixed-size hash table of search results keyed by Zobrist hash.
+
+    All storage is one preallocated buffer viewed as parallel arrays. Each
+    bucket holds two entries: a depth-preferred slot that keeps the deepest
+    result seen, and an always-replace slot that takes everything else,
+    including the entry a deeper result displaces, so shallow results never
+    push out expensive deep ones.
+
+    The buffer may be shared memory written by several processes at once.
+    The stored key is XORed with the entry's data, so an entry torn by two
+    concurrent writers no longer matches its key and reads as a miss.
+    """
+
+    def __init__(self, megabytes: float = 16, buffer=None):
+        nbytes = table_bytes(megabytes)
+        if buffer is None:
+            buffer = bytearray(nbytes)
+            fresh = True
+        else:
+            if len(buffer) < nbytes:
+                raise ValueError("Buffer is smaller than the table.")
+            fresh = False
+        size = nbytes // ENTRY_BYTES
+        self.__mask = size // 2 - 1
+        view = memoryview(buffer)
+        self.__keys = view[:8 * size].cast("Q")
+        self.__scores = view[8 * size:12 * size].cast("i")
+        self.__moves = view[12 * size:14 * size].cast("H")
+        self.__depth_bytes = view[14 * size:15 * size]
+        self.__depths = self.__depth_bytes.cast("b")
+        self.__bounds = view[15 * size:16 * size].cast("B")
+        if fresh:
+            self.clear()
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.__keys)
+
+    @property
+    def megabytes(self) -> float:
+        return self.size * ENTRY_BYTES / (1 << 20)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+    def __key_at(self, slot: int, depth: int, score: int, bound: int, move: int) -> int:
+        return self.__keys[slot] ^ (score & 0xFFFFFFFF | (depth & 0xFF) << 32 | bound << 40 | move << 48)
+
+    def probe(self, key: int):
+        """Return (depth, score, bound, move) stored for key, or None."""
+        self.probes += 1
+        slot = (key & self.__mask) << 1
+        for slot in (slot, slot + 1):
+            depth = self.__depths[slot]
+            if depth < 0:
+                continue
+            score, bound, move = self.__scores[slot], self.__bounds[slot], self.__moves[slot]
+            if self.__key_at(slot, depth, score, bound, move) == key:
+                self.hits += 1
+                return depth, score, bound, move
+        return None
+
+    def store(self, key: int, depth: int, score: int, bound: int, move: int):
+        self.stores += 1
+        slot = (key & self.__mask) << 1
+        stored_depth = self.__depths[slot]
+        if stored_depth >= 0:
+            stored_key = self.__key_at(slot, stored_depth, self.__scores[slot], self.__bounds[slot], self.__moves[slot])
+            if stored_key != key:
+                if depth < stored_depth:
+                    slot += 1
+                else:
+                    # the deeper result takes the slot and the one it displaces
+                    # moves down to the always-replace slot instead of being lost
+                    below = slot + 1
+                    self.__depths[below] = stored_depth
+                    self.__scores[below] = self.__scores[slot]
+                    self.__bounds[below] = self.__bounds[slot]
+                    self.__moves[below] = self.__moves[slot]
+                    self.__keys[below] = self.__keys[slot]
+        self.__depths[slot] = depth
+        self.__scores[slot] = score
+        self.__bounds[slot] = bound
+        self.__moves[slot] = move
+        self.__keys[slot] = key ^ (score & 0xFFFFFFFF | (depth & 0xFF) << 32 | bound << 40 | move << 48)
+
+    def clear(self):
+        # depth -1 marks an empty slot
+        self.__depth_bytes[:] = b"\xff" * len(self.__depth_bytes)
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def stats(self) -> dict:
+        return {
+            "megabytes": self.megabytes,
+            "entries": self.size,
+            "probes": self.probes,
+            "hits": self.hits,
+            "stores": self.stores,
+            "hit_rate": self.hit_rate,
+        }
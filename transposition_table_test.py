@@ -0,0 +1,111 @@
+import struct
+import unittest
+from transposition_table import EXACT, LOWER, UPPER, ENTRY_BYTES, TranspositionTable, table_bytes
+
+# 32 buckets of two entries
+MEGABYTES = 1 / 1024
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_size(self):
+        table = TranspositionTable(MEGABYTES)
+        self.assertEqual(table.size, 64)
+        self.assertEqual(table_bytes(MEGABYTES), 64 * ENTRY_BYTES)
+        with self.assertRaises(ValueError):
+            TranspositionTable(0)
+
+    def test_store_and_probe(self):
+        table = TranspositionTable(MEGABYTES)
+        self.assertIsNone(table.probe(12345))
+        table.store(12345, 3, -250, LOWER, 777)
+        self.assertEqual(table.probe(12345), (3, -250, LOWER, 777))
+        self.assertIsNone(table.probe(12345 + 32))
+        self.assertEqual((table.probes, table.hits, table.stores), (3, 1, 1))
+
+    def test_deeper_result_stays(self):
+        # keys 1, 33 and 65 share a bucket
+        table = TranspositionTable(MEGABYTES)
+        table.store(1, 6, 10, EXACT, 1)
+        table.store(33, 2, 20, UPPER, 2)
+        self.assertEqual(table.probe(1), (6, 10, EXACT, 1))
+        self.assertEqual(table.probe(33), (2, 20, UPPER, 2))
+        # a second shallow result takes the always-replace slot
+        table.store(65, 1, 30, EXACT, 3)
+        self.assertEqual(table.probe(1), (6, 10, EXACT, 1))
+        self.assertIsNone(table.probe(33))
+        self.assertEqual(table.probe(65), (1, 30, EXACT, 3))
+
+    def test_deeper_result_displaces(self):
+        # the displaced entry moves down to the always-replace slot
+        table = TranspositionTable(MEGABYTES)
+        table.store(1, 2, 10, EXACT, 1)
+        table.store(33, 5, 20, EXACT, 2)
+        self.assertEqual(table.probe(1), (2, 10, EXACT, 1))
+        self.assertEqual(table.probe(33), (5, 20, EXACT, 2))
+        # and the next deeper result pushes that one out
+        table.store(65, 7, 30, LOWER, 3)
+        self.assertIsNone(table.probe(1))
+        self.assertEqual(table.probe(33), (5, 20, EXACT, 2))
+        self.assertEqual(table.probe(65), (7, 30, LOWER, 3))
+
+    def test_same_depth_displaces(self):
+        table = TranspositionTable(MEGABYTES)
+        table.store(1, 4, 10, EXACT, 1)
+        table.store(33, 4, 20, UPPER, 2)
+        self.assertEqual(table.probe(1), (4, 10, EXACT, 1))
+        self.assertEqual(table.probe(33), (4, 20, UPPER, 2))
+
+    def test_deeper_result_replaces_stale_copy(self):
+        # a key already in the always-replace slot is not kept twice
+        table = TranspositionTable(MEGABYTES)
+        table.store(1, 6, 10, EXACT, 1)
+        table.store(33, 2, 20, UPPER, 2)
+        table.store(33, 8, 25, EXACT, 4)
+        self.assertEqual(table.probe(33), (8, 25, EXACT, 4))
+        self.assertEqual(table.probe(1), (6, 10, EXACT, 1))
+
+    def test_same_position_replaces_deep_entry(self):
+        # a newer result for the same position overwrites it even when shallower
+        table = TranspositionTable(MEGABYTES)
+        table.store(1, 6, 10, EXACT, 1)
+        table.store(1, 2, 15, LOWER, 4)
+        self.assertEqual(table.probe(1), (2, 15, LOWER, 4))
+
+    def test_clear(self):
+        table = TranspositionTable(MEGABYTES)
+        table.store(1, 6, 10, EXACT, 1)
+        table.clear()
+        self.assertIsNone(table.probe(1))
+        self.assertEqual(table.stats()["stores"], 0)
+
+    def test_shared_buffer(self):
+        buffer = bytearray(table_bytes(MEGABYTES))
+        writer = TranspositionTable(MEGABYTES, buffer)
+        writer.clear()
+        reader = TranspositionTable(MEGABYTES, buffer)
+        writer.store(1, 6, 10, EXACT, 1)
+        self.assertEqual(reader.probe(1), (6, 10, EXACT, 1))
+        with self.assertRaises(ValueError):
+            TranspositionTable(MEGABYTES, bytearray(100))
+
+    def test_torn_entry_misses(self):
+        # Another writer overwrote one field of the entry for key 1 (slot 2)
+        # before it wrote the rest: the entry no longer matches its key
+        size = 64
+        fields = (
+            ("i", 8 * size + 4 * 2, 999),  # score
+            ("H", 12 * size + 2 * 2, 55),  # move
+            ("b", 14 * size + 2, 3),  # depth
+            ("B", 15 * size + 2, UPPER),  # bound
+        )
+        for layout, offset, value in fields:
+            buffer = bytearray(table_bytes(MEGABYTES))
+            table = TranspositionTable(MEGABYTES, buffer)
+            table.clear()
+            table.store(1, 6, 10, EXACT, 1)
+            struct.pack_into(layout, buffer, offset, value)
+            self.assertIsNone(table.probe(1), layout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,12 @@
+import random
+
+# Zobrist keys: one random 64-bit number per (piece kind, square) plus one for
+# black to move. A position's hash is the XOR of the keys of everything on it,
+# so a move only has to XOR out the old squares and XOR in the new ones.
+#
+# The seed is fixed so the same position hashes the same in every process,
+# which matters for anything stored on disk or shared between workers.
+_rng = random.Random(0x5A0B215)
+
+PIECE_KEYS = tuple(tuple(_rng.getrandbits(64) for _ in range(64)) for _ in range(12))
+BLACK_TO_MOVE = _rng.getrandbits(64)